@@ -1,9 +1,12 @@
-import re
-import os
+from jsx_tools import profile
+from jsx_tools.anchors import Declaration, Element, Through
+from jsx_tools.patch import Patch
+
+profile.from_argv()
 
 path = r'e:\anti\okinawa\src\App.tsx'
-with open(path, 'r', encoding='utf-8') as f:
-    content = f.read()
+# All anchors are checked against the file as loaded; it is written once, or not at all
+patch = Patch(path)
 
 # 1. Add accommodation management functions
 acc_functions = """
@@ -47,7 +50,7 @@ acc_functions = """
     };
 """
 
-content = re.sub(r'(const addPoint = .*?\n    };)', r'\1\n' + acc_functions, content, flags=re.DOTALL)
+patch.insert_after(Declaration('addPoint'), '\n' + acc_functions, count=None)
 
 # 2. Update Summary UI
 # Replace line 1651-1665 approx (Key Items section)
@@ -107,9 +110,10 @@ new_acc_section = """
 """
 
 # Targets line 1651 section
-content = re.sub(r'\{\/\* Key Items List \(Logistics & Stay\) \*\/\}\s+<section className="overview-section">.*?</section>', new_acc_section, content, flags=re.DOTALL)
+patch.replace(Through('{/* Key Items List (Logistics & Stay) */}', Element('section', attrs='className="overview-section"')),
+              new_acc_section, count=None)
 
-with open(path, 'w', encoding='utf-8') as f:
-    f.write(content)
+patch.apply()
+patch.report()
 
 print("Successfully applied accommodation management edits.")
@@ -1,21 +1,24 @@
-import re
-import os
+from jsx_tools import profile
+from jsx_tools.anchors import Declaration, Element
+from jsx_tools.patch import Patch
+
+profile.from_argv()
 
 path = r'e:\anti\okinawa\src\App.tsx'
-with open(path, 'r', encoding='utf-8') as f:
-    content = f.read()
+# All anchors are checked against the file as loaded; it is written once, or not at all.
+# `unless` skips an edit whose marker text is already in the file, so reruns are no-ops.
+patch = Patch(path)
 
 # 1. Add Hotel Search State near other states
-if 'isSearchingHotels' not in content:
-    hotel_state = """
+hotel_state = """
     const [isSearchingHotels, setIsSearchingHotels] = useState(false);
     const [recommendedHotels, setRecommendedHotels] = useState<any[]>([]);
 """
-    content = re.sub(r'(const \[dynamicAttractions, setDynamicAttractions\] = useState<any\[\]>\(\[\]\);)', r'\1' + hotel_state, content)
+patch.insert_after('const [dynamicAttractions, setDynamicAttractions] = useState<any[]>([]);', hotel_state,
+                   count=None, unless='isSearchingHotels')
 
 # 2. Add fetchHotelsWithAI function
-if 'fetchHotelsWithAI' not in content:
-    hotel_func = """
+hotel_func = """
     const fetchHotelsWithAI = async (destination: string) => {
         setIsSearchingHotels(true);
         try {
@@ -36,7 +39,7 @@ if 'fetchHotelsWithAI' not in content:
             const result = await model.generateContent(prompt);
             const text = result.response.text().trim();
             const cleanedText = text.replace(/```json/g, '').replace(/```/g, '').trim();
-            const jsonMatch = cleanedText.match(/\\[[\\\\s\\\\S]*\\]/);
+            const jsonMatch = cleanedText.match(/\\[[\\s\\S]*\\]/);
 
             if (jsonMatch) {
                 setRecommendedHotels(JSON.parse(jsonMatch[0]));
@@ -48,11 +51,11 @@ if 'fetchHotelsWithAI' not in content:
         }
     };
 """
-    content = re.sub(r'(const fetchAttractionsWithAI = async \(destination: string\) => \{.*?\n    \};)', r'\1\n' + hotel_func, content, flags=re.DOTALL)
+patch.insert_after(Declaration('fetchAttractionsWithAI'), '\n' + hotel_func, count=None,
+                   unless='fetchHotelsWithAI')
 
 # 3. Update Step 7.5 UI
-if 'AI 숙소 추천받기' not in content:
-    ai_search_ui = """
+ai_search_ui = """
                                                 <div className="glass-card" style={{ padding: '30px', border: '2px dashed rgba(0,212,255,0.3)', background: 'rgba(0,212,255,0.02)', display: 'flex', flexDirection: 'column', alignItems: 'center', justifyContent: 'center', gap: 15, cursor: 'pointer' }} onClick={() => fetchHotelsWithAI(plannerData.destination)}>
                                                     <Sparkles size={32} color="var(--primary)" />
                                                     <div style={{ textAlign: 'center' }}>
@@ -61,12 +64,13 @@ if 'AI 숙소 추천받기' not in content:
                                                     </div>
                                                 </div>
 """
-    # Replace the "바우처 자동 인식" card
-    content = re.sub(r'<div className="glass-card" style=\{\{ padding: \'30px\', border: \'2px dashed rgba\(0,212,255,0.3\)\', background: \'rgba\(0,212,255,0.02\)\'.*?\}\} onClick=\{.*?\}>.*?<\/div>', ai_search_ui, content, flags=re.DOTALL)
+# Replace the "바우처 자동 인식" card
+voucher_card = Element('div', attrs=('className="glass-card"', 'onClick=',
+                                     "padding: '30px', border: '2px dashed rgba(0,212,255,0.3)', background: 'rgba(0,212,255,0.02)'"))
+patch.replace(voucher_card, ai_search_ui, count=None, unless='AI 숙소 추천받기')
 
 # 4. Show Recommended Hotels
-if 'AI 추천 숙소' not in content:
-    recommended_list_ui = """
+recommended_list_ui = """
                                             {recommendedHotels.length > 0 && (
                                                 <div style={{ marginBottom: '30px' }}>
                                                     <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center', marginBottom: '15px' }}>
@@ -93,9 +97,10 @@ if 'AI 추천 숙소' not in content:
                                                 </div>
                                             )}
 """
-    content = content.replace('{plannerData.accommodations.length > 0 && (', recommended_list_ui + '\n                                            {plannerData.accommodations.length > 0 && (')
+patch.insert_before('{plannerData.accommodations.length > 0 && (', recommended_list_ui + '\n                                            ',
+                    count=None, unless='AI 추천 숙소')
 
-with open(path, 'w', encoding='utf-8') as f:
-    f.write(content)
+patch.apply()
+patch.report()
 
 print("Successfully applied AI hotel search edits.")
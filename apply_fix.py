@@ -1,34 +1,35 @@
-import os
+import re
 
-path = r'e:\anti\okinawa\src\App.tsx'
-with open(path, 'rb') as f:
-    data = f.read()
+from jsx_tools import profile
+from jsx_tools.line_index import LineIndex
+from jsx_tools.splice import SpliceBuffer
 
-# Fix common corruption patterns
-patterns = [
-    (b'ocaleCompare', b'localeCompare'),
-    (b'caleCompare', b'localeCompare'),
-]
+profile.from_argv()
 
-for p, r in patterns:
-    if p in data:
-        print(f"Replacing {p} with {r}")
-        data = data.replace(p, r)
+path = r'e:\anti\okinawa\src\App.tsx'
+buf = SpliceBuffer.load(path)
+data = buf.data
 
-# Fix the specific corrupted line 2563
-# based on our debug output, it had many spaces/nulls then sort...
-import re
-# Match any line that has a lot of nulls/spaces and ends with sort...
-# But simpler: just find where uniqueKeys should be.
-target_line = b'                                                const uniqueKeys = Array.from(new Set(groupKeys)).sort((a, b) => b.localeCompare(a));\r\n'
+# Fix common corruption patterns: 'localeCompare' with its first one or two letters lost.
+# Whole words only, so the 'localeCompare' calls that are intact are left alone.
+fragment = re.compile(rb'(?<![\w$])o?caleCompare\b')
+for m in fragment.finditer(data):
+    print(f"Replacing {m.group()} with b'localeCompare'")
+    buf.splice(m.start(), m.end(), b'localeCompare')
 
-# Let's just fix the whole file's line 2563 and 4870 specifically by splitting and joining
-lines = data.splitlines(keepends=True)
-if len(lines) > 2562:
-    lines[2562] = b'                                                const uniqueKeys = Array.from(new Set(groupKeys)).sort((a, b) => b.localeCompare(a));\r\n'
-if len(lines) > 4869:
-    lines[4869] = b'                                                            {[...plannerData.accommodations].sort((a, b) => a.startDate.localeCompare(b.startDate)).map((acc: any, idx: number) => (\r\n'
+# Lines 2563 and 4870 were overwritten with NULs/spaces and a copy of other lines;
+# splice in the known-good text, in the file's own newline style
+index = LineIndex.build(data)
+good = {
+    2563: "                                                const uniqueKeys = Array.from(new Set(groupKeys)).sort((a, b) => b.localeCompare(a));\n",
+    4870: "                                                            {[...plannerData.accommodations].sort((a, b) => a.startDate.localeCompare(b.startDate)).map((acc: any, idx: number) => (\n",
+}
+for line, text in good.items():
+    if line <= index.line_count:
+        a, b = index.span(line)
+        # a fragment fix inside this line is superseded by the whole-line replacement
+        buf.splices = [s for s in buf.splices if not a <= s[0] < b]
+        buf.splice(a, b, buf.encode(text))
 
-with open(path, 'wb') as f:
-    f.writelines(lines)
+buf.save(path)
 print("Fix applied.")
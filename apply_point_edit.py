@@ -1,9 +1,12 @@
-import re
-import os
+from jsx_tools import profile
+from jsx_tools.anchors import ClosingTag, Element
+from jsx_tools.patch import Patch
+
+profile.from_argv()
 
 path = r'e:\anti\okinawa\src\App.tsx'
-with open(path, 'r', encoding='utf-8') as f:
-    content = f.read()
+# All anchors are checked against the file as loaded; it is written once, or not at all
+patch = Patch(path)
 
 # 1. Add isEditingPoint state and savePointEdit function
 edit_state_func = """
@@ -19,7 +22,8 @@ edit_state_func = """
         showToast('정보가 수정되었습니다.');
     };
 """
-content = re.sub(r'(const \[isSearchingHotels, setIsSearchingHotels\] = useState\(false\);)', edit_state_func + r'\1', content)
+patch.insert_before('const [isSearchingHotels, setIsSearchingHotels] = useState(false);', edit_state_func,
+                    count=None)
 
 # 2. Update Bottom Sheet UI to support Editing
 # Header area: add "Edit" icon next to title
@@ -38,8 +42,9 @@ new_header = """
                                             </div>
 """
 
-# Replace lines 2307-2310
-content = re.sub(r'<div style=\{\{ marginBottom: \'20px\' \}\}>\s+<h3 style=\{\{ fontSize: \'24px\', fontWeight: 800, color: \'var\(--text-primary\)\' \}\}>\{selectedPoint\.name\}<\/h3>\s+<p style=\{\{ color: \'var\(--primary\)\', fontWeight: 600 \}\}>\{selectedPoint\.category\.toUpperCase\(\)\}<\/p>\s+<\/div>', new_header, content, flags=re.DOTALL)
+# The title block: the marginBottom 20px <div> around {selectedPoint.name}
+patch.replace(Element('div', attrs="style={{ marginBottom: '20px' }}", contains='{selectedPoint.name}'), new_header,
+              count=None)
 
 # 3. Add Edit Form in Bottom Sheet (when isEditingPoint is true)
 edit_form_ui = """
@@ -94,14 +99,13 @@ edit_form_ui = """
 """
 
 # Replace the beginning of the button grid
-content = content.replace('<div style={{ display: \'grid\', gridTemplateColumns: \'1fr 1fr\', gap: \'12px\', marginBottom: \'24px\' }}>', edit_form_ui)
+grid_start = '<div style={{ display: \'grid\', gridTemplateColumns: \'1fr 1fr\', gap: \'12px\', marginBottom: \'24px\' }}>'
+patch.replace(grid_start, edit_form_ui, count=None)
 
-# Add closing parenthesis for the conditional
-# Need to find where the grid ends
-grid_end = '                                                {selectedPoint.mapcode && (\n                                                    <div className="glass-card" style={{ padding: \'12px\', textAlign: \'center\', margin: 0 }}>\n                                                        <div style={{ fontSize: \'10px\', opacity: 0.5 }}>맵코드</div>\n                                                        <div style={{ fontWeight: 700, color: \'var(--text-primary)\' }}>{selectedPoint.mapcode}</div>\n                                                    </div>\n                                                )}\n                                            </div>'
-content = content.replace(grid_end, grid_end + '\n                                            )}')
+# Add closing parenthesis for the conditional, right after the grid's own </div>
+patch.insert_after(ClosingTag(grid_start), '\n                                            )}', count=None)
 
-with open(path, 'w', encoding='utf-8') as f:
-    f.write(content)
+patch.apply()
+patch.report()
 
 print("Successfully applied point editing edits.")
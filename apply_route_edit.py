@@ -1,9 +1,12 @@
-import re
-import os
+from jsx_tools import profile
+from jsx_tools.anchors import Declaration, Element
+from jsx_tools.patch import Patch
+
+profile.from_argv()
 
 path = r'e:\anti\okinawa\src\App.tsx'
-with open(path, 'r', encoding='utf-8') as f:
-    content = f.read()
+# All anchors are checked against the file as loaded; it is written once, or not at all
+patch = Patch(path)
 
 # 1. Add deletePoint and addPoint functions after handleReorder
 new_functions = """
@@ -35,7 +38,7 @@ new_functions = """
     };
 """
 
-content = re.sub(r'(const handleReorder = .*?\n    };)', r'\1\n' + new_functions, content, flags=re.DOTALL)
+patch.insert_after(Declaration('handleReorder'), '\n' + new_functions, count=None)
 
 # 2. Add Delete button to Schedule list
 # Target: next to toggleComplete button
@@ -57,7 +60,8 @@ delete_button_html = """
 """
 
 # Find the toggleComplete button and replace/wrap it
-content = re.sub(r'<button\s+onClick=\{\(e\)\s+=>\s+toggleComplete\(p\.id,\s+e\)\}.*?>\s+\{isDone\s+\?\s+<CheckCircle\s+size=\{24\}\s+/>\s+:\s+<Circle\s+size=\{24\}\s+/>\}\s+</button>', delete_button_html, content, flags=re.DOTALL)
+patch.replace(Element('button', attrs='onClick={(e) => toggleComplete(p.id, e)}'), delete_button_html,
+              count=None)
 
 # 3. Add "Add Point" button at the bottom of the list
 add_point_button_html = """
@@ -78,9 +82,9 @@ add_point_button_html = """
                                                     </div>
 """
 
-content = content.replace('</Reorder.Group>', add_point_button_html)
+patch.replace('</Reorder.Group>', add_point_button_html, count=None)
 
-with open(path, 'w', encoding='utf-8') as f:
-    f.write(content)
+patch.apply()
+patch.report()
 
 print("Successfully applied route modification edits.")
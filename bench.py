@@ -0,0 +1,53 @@
+import sys
+
+from jsx_tools import bench
+
+if __name__ == '__main__':
+    # Times every checker and patch tool on synthetic App.tsx files (1k to 1M lines).
+    #   --sizes=1000,10000   corpus sizes in lines
+    #   --only=check_jsx,... benchmarks to run
+    #   --out=FILE           results JSON (default bench_results.json)
+    #   --baseline=FILE      compare against this run (default bench_baseline.json)
+    #   --threshold=0.25     allowed slowdown before the run fails
+    #   --save-baseline      store this run as the new baseline
+    sizes = bench.SIZES
+    names = None
+    out = 'bench_results.json'
+    baseline_path = 'bench_baseline.json'
+    threshold = bench.THRESHOLD
+    for a in sys.argv[1:]:
+        key, _, value = a.partition('=')
+        if key == '--sizes':
+            sizes = [int(s) for s in value.split(',')]
+        elif key == '--only':
+            names = value.split(',')
+        elif key == '--out':
+            out = value
+        elif key == '--baseline':
+            baseline_path = value
+        elif key == '--threshold':
+            threshold = float(value)
+
+    results = bench.run(sizes, names)
+    bench.save(out, results)
+    print(f"Results written to {out}.")
+    if '--save-baseline' in sys.argv:
+        bench.save(baseline_path, results)
+        print(f"Baseline saved to {baseline_path}.")
+        sys.exit(0)
+
+    baseline = bench.load(baseline_path)
+    if baseline is None:
+        # Nothing to compare against is a failure, not a pass: a gate that exits 0 here
+        # never catches anything
+        print(f"NO BASELINE: {baseline_path} is missing or from an older benchmark version; "
+              f"nothing was compared. Run with --save-baseline on this machine to create one.",
+              file=sys.stderr)
+        sys.exit(1)
+    slow = bench.regressions(results, baseline, threshold)
+    for key, base, seconds in slow:
+        print(f"REGRESSION {key}: {base * 1000:.1f} ms -> {seconds * 1000:.1f} ms "
+              f"(+{(seconds / base - 1) * 100:.0f}%)")
+    if slow:
+        sys.exit(1)
+    print(f"No regressions beyond {threshold:.0%} against {baseline_path}.")
@@ -0,0 +1,33 @@
+import os
+import sys
+
+from jsx_tools import profile
+from jsx_tools.git import CatFile, GitError
+from jsx_tools.history import bisect_history, print_bisect
+
+if __name__ == '__main__':
+    profile.from_argv()
+    # Finds the commit that broke a file's brackets or tags by bisecting its git history,
+    # and the last good blob before it. --rev=REV bisects REV's history instead of HEAD's,
+    # --good=REV starts from a known good revision instead of the oldest one, and
+    # --save=FILE writes the last good version out (a backup for repair_file.py).
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    path = args[0] if args else r'e:\anti\okinawa\src\App.tsx'
+    options = dict(a[2:].split('=', 1) for a in sys.argv[1:] if a.startswith('--') and '=' in a)
+    engine = 'reference' if '--reference' in sys.argv else 'fast'
+    # git runs in the file's directory, so any path inside the repository works
+    repo, name = os.path.split(os.path.abspath(path))
+
+    try:
+        result = bisect_history(repo, name, options.get('rev', 'HEAD'), options.get('good'), engine=engine)
+    except GitError as e:
+        print(e)
+        sys.exit(2)
+    print_bisect(path, result)
+    if result is not None and result.last_good is not None and 'save' in options:
+        with CatFile(repo) as cat:
+            _, data = cat.read(result.last_good.blob)
+        with open(options['save'], 'wb') as f:
+            f.write(data)
+        print(f"Saved the last good version to {options['save']}.")
+    sys.exit(0 if result is None or result.first_bad is None else 1)
@@ -0,0 +1,21 @@
+import sys
+
+from jsx_tools import profile
+from jsx_tools.project import check_files, find_sources, print_report
+
+if __name__ == '__main__':
+    profile.from_argv()
+    # Brackets and tags over every .ts/.tsx file under the source root, one process per core.
+    # --jobs=N limits the pool, --quiet drops the per-file timings.
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    root = args[0] if args else r'e:\anti\okinawa\src'
+    workers = None
+    for a in sys.argv[1:]:
+        if a.startswith('--jobs='):
+            workers = int(a.split('=', 1)[1])
+    engine = 'reference' if '--reference' in sys.argv else 'fast'
+
+    results = check_files(find_sources(root), engine=engine, workers=workers)
+    profile.current().count('files', len(results))
+    problems = print_report(results, root, timings='--quiet' not in sys.argv)
+    sys.exit(1 if problems else 0)
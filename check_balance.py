@@ -1,66 +1,45 @@
-import re
+import sys
 
-def check_jsx_balance(content, start_line, end_line):
-    subset = content.split('\n')[start_line-1:end_line]
-    stack = []
-    
-    # Simple state machine to ignore strings and comments
-    in_string = None # '"', "'", "`"
-    in_comment = None # '//', '/*'
-    
-    for i, line in enumerate(subset):
-        actual_line_num = start_line + i
-        j = 0
-        while j < len(line):
-            char = line[j]
-            
-            # String handling
-            if in_string:
-                if char == in_string and (j == 0 or line[j-1] != '\\'):
-                    in_string = None
-                j += 1
-                continue
-            
-            # Comment handling
-            if in_comment == '//':
-                break # Rest of the line is a comment
-            if in_comment == '/*':
-                if line[j:j+2] == '*/':
-                    in_comment = None
-                    j += 2
-                else:
-                    j += 1
-                continue
-                
-            # Check for comment start
-            if line[j:j+2] == '//':
-                break
-            if line[j:j+2] == '/*':
-                in_comment = '/*'
-                j += 2
-                continue
-            
-            # Check for string start
-            if char in "\"'`":
-                in_string = char
-                j += 1
-                continue
-            
-            # Brackets
-            if char in '({[':
-                stack.append((char, actual_line_num))
-            elif char in ')}]':
-                if not stack:
-                    print(f"Extra closing {char} at line {actual_line_num}")
-                else:
-                    last_char, last_line = stack.pop()
-                    expected = {'(': ')', '{': '}', '[': ']'}[last_char]
-                    if char != expected:
-                        print(f"Mismatch: {last_char} at {last_line} closed by {char} at {actual_line_num}")
-            j += 1
+from jsx_tools import profile
+from jsx_tools.checks import check_file, check_text
+from jsx_tools.depth import triage
+from jsx_tools.line_index import read_range
+from jsx_tools.locate import print_location
 
-    for char, line in stack:
-        print(f"Unclosed {char} from line {line}")
+def check_jsx_balance(content, start_line, end_line, engine='fast'):
+    # Brackets only; strings, comments, template literals and regexes come from the shared lexer.
+    # engine='reference' runs the old char-by-char loop instead of the skip-scan engine.
+    for d in check_text(content, start_line, end_line, checks=('brackets',), engine=engine):
+        print(d.message)
 
-content = open(r'e:\anti\okinawa\src\App.tsx', 'r', encoding='utf-8').read()
-check_jsx_balance(content, 2635, 3698)
+if __name__ == '__main__':
+    profile.from_argv()
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    engine = 'reference' if '--reference' in sys.argv else 'fast'
+    path = args[0] if args else r'e:\anti\okinawa\src\App.tsx'
+    start_line = int(args[1]) if len(args) > 1 else 2635
+    end_line = int(args[2]) if len(args) > 2 else 3698
+
+    # --locate: no range needed, find the first mismatch and the smallest region around it
+    if '--locate' in sys.argv:
+        sys.exit(0 if print_location(path) is None else 1)
+
+    # --triage: only the vectorized depth-profile prefilter, in milliseconds. Its mask comes
+    # from the coarse spans, which take an apostrophe or '//' in JSX text for a string or a
+    # comment, so its "clean" is a hint: the default path always runs the lexer below
+    # (the result cache makes a rerun on an unchanged file cost only a hash).
+    if '--triage' in sys.argv:
+        prof = profile.current()
+        with prof.phase('read'):
+            data = read_range(path, start_line, end_line)
+        prof.count('bytes_read', len(data))
+        with prof.phase('triage'):
+            result = triage(data, start_line)
+        print(result)
+        sys.exit(0 if result.clean else 1)
+
+    # Resumes from the nearest persisted lexer checkpoint instead of re-lexing from line 1
+    diagnostics = check_file(path, start_line, end_line, checks=('brackets',), engine=engine)
+    for d in diagnostics:
+        print(d.message)
+    sys.exit(1 if diagnostics else 0)
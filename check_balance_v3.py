@@ -1,30 +1,14 @@
-import re
+import sys
 
-def check_jsx_balance(file_path):
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+from jsx_tools import profile
+from jsx_tools.checks import VOID_TAGS, check_file, print_tag_balance
 
-    # Simple tag balancer
-    tags = re.findall(r'<(/?)([a-zA-Z0-9\.]+)', content)
-    stack = []
-    void_tags = {'img', 'br', 'hr', 'input', 'link', 'meta'}
-    
-    for closing, tag in tags:
-        if tag in void_tags:
-            continue
-        if closing == '/':
-            if not stack:
-                print(f"Extra closing tag: </{tag}>")
-            else:
-                top = stack.pop()
-                if top != tag:
-                    print(f"Mismatch: <{top}> closed by </{tag}>")
-        else:
-            stack.append(tag)
-    
-    if stack:
-        print("Unclosed tags:", stack)
-    else:
-        print("All tags balanced according to simple check.")
+def check_jsx_balance(file_path):
+    # Simple tag balancer over the whole file (void tags are skipped)
+    diagnostics = check_file(file_path, checks=('tags',), ignore_tags=VOID_TAGS)
+    print_tag_balance(diagnostics, "All tags balanced according to simple check.")
 
-check_jsx_balance(r'e:\anti\okinawa\src\App.tsx')
+if __name__ == '__main__':
+    profile.from_argv()
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    check_jsx_balance(args[0] if args else r'e:\anti\okinawa\src\App.tsx')
@@ -1,32 +1,23 @@
-import re
+import sys
 
-def check_jsx_balance(file_path):
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+from jsx_tools import profile
+from jsx_tools.checks import check_file, print_tag_balance
+from jsx_tools.locate import print_location
 
-    # Find all tags, including self-closing ones
-    # Group 1: / if closing
-    # Group 2: tag name
-    # Group 3: / if self-closing at end
-    tags = re.findall(r'<(/?)([a-zA-Z0-9\.]+)[^>]*?(/?)>', content)
-    stack = []
-    
-    for closing, tag, self_closing in tags:
-        if self_closing == '/':
-            continue
-        if closing == '/':
-            if not stack:
-                print(f"Extra closing tag: </{tag}>")
-            else:
-                top = stack.pop()
-                if top != tag:
-                    print(f"Mismatch: <{top}> closed by </{tag}>")
-        else:
-            stack.append(tag)
-    
-    if stack:
-        print("Unclosed tags:", stack)
-    else:
-        print("All tags balanced according to check.")
+def check_jsx_balance(file_path, workers=None):
+    # Tags, including self-closing ones; with workers > 1 a long file is scanned in
+    # chunks over a process pool
+    diagnostics = check_file(file_path, checks=('tags',), workers=workers)
+    print_tag_balance(diagnostics, "All tags balanced according to check.")
 
-check_jsx_balance(r'e:\anti\okinawa\src\App.tsx')
+if __name__ == '__main__':
+    profile.from_argv()
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    path = args[0] if args else r'e:\anti\okinawa\src\App.tsx'
+    workers = None
+    for a in sys.argv[1:]:
+        if a.startswith('--jobs='):
+            workers = int(a.split('=', 1)[1])
+    if '--locate' in sys.argv:
+        sys.exit(0 if print_location(path) is None else 1)
+    check_jsx_balance(path, workers)
@@ -0,0 +1,31 @@
+import sys
+
+from jsx_tools import profile
+from jsx_tools.diffcheck import check_diff, print_report
+from jsx_tools.git import GitError
+
+if __name__ == '__main__':
+    profile.from_argv()
+    # Brackets and tags around the lines a diff touched, for a pre-commit hook:
+    #   check_diff.py              working tree against HEAD
+    #   check_diff.py REV          working tree against REV
+    #   check_diff.py REV1 REV2    REV1 against REV2 (REV1..REV2 works too)
+    # --cached checks what is staged instead of the working tree, --repo=DIR another
+    # repository than the current directory. Exits 1 when the diff brought in a problem.
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    if len(args) == 1 and '..' in args[0]:
+        args = args[0].split('..', 1)
+    base = args[0] if args else 'HEAD'
+    head = args[1] if len(args) > 1 else None
+    repo = '.'
+    for a in sys.argv[1:]:
+        if a.startswith('--repo='):
+            repo = a.split('=', 1)[1]
+    engine = 'reference' if '--reference' in sys.argv else 'fast'
+
+    try:
+        report = check_diff(repo, base, head, cached='--cached' in sys.argv, engine=engine)
+    except GitError as e:
+        print(e)
+        sys.exit(2)
+    sys.exit(1 if print_report(report) else 0)
@@ -1,44 +1,24 @@
-import re
+import sys
 
-def check_jsx_tags(content, start_line, end_line):
-    subset = content.split('\n')[start_line-1:end_line]
-    stack = []
-    
-    # regex for tags
-    # <Tag ... > or <Tag ... /> or </Tag>
-    # Note: this is very simplified
-    tag_pattern = re.compile(r'<(/?)([a-zA-Z0-9\.]+)([^>]*)>')
-    
-    for i, line in enumerate(subset):
-        actual_line_num = start_line + i
-        
-        # Strip comments etc (very roughly)
-        line = line.split('//')[0]
-        
-        matches = tag_pattern.finditer(line)
-        for m in matches:
-            is_closing = m.group(1) == '/'
-            tag_name = m.group(2)
-            props = m.group(3)
-            is_self_closing = props.strip().endswith('/')
-            
-            # Skip fragments <> and </>
-            if not tag_name: continue
-            
-            if is_self_closing:
-                continue
-            elif is_closing:
-                if not stack:
-                    print(f"Extra closing tag </{tag_name}> at line {actual_line_num}")
-                else:
-                    last_tag, last_line = stack.pop()
-                    if last_tag != tag_name:
-                        print(f"Mismatch: <{last_tag}> at {last_line} closed by </{tag_name}> at {actual_line_num}")
-            else:
-                stack.append((tag_name, actual_line_num))
+from jsx_tools import profile
+from jsx_tools.checks import check_file, check_text
+from jsx_tools.locate import print_location
 
-    for tag, line in stack:
-        print(f"Unclosed tag <{tag}> from line {line}")
+def check_jsx_tags(content, start_line, end_line):
+    # <Tag ...>, <Tag ... />, </Tag> and fragments <> </> from the shared lexer,
+    # so tags inside strings and comments are no longer counted
+    for d in check_text(content, start_line, end_line, checks=('tags',)):
+        print(d.message)
 
-content = open(r'e:\anti\okinawa\src\App.tsx', 'r', encoding='utf-8').read()
-check_jsx_tags(content, 2635, 3698)
+if __name__ == '__main__':
+    profile.from_argv()
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    path = args[0] if args else r'e:\anti\okinawa\src\App.tsx'
+    start_line = int(args[1]) if len(args) > 1 else 2635
+    end_line = int(args[2]) if len(args) > 2 else 3698
+    # --locate: no range needed, find the first mismatch and the smallest region around it
+    if '--locate' in sys.argv:
+        sys.exit(0 if print_location(path) is None else 1)
+    # Resumes from the nearest persisted lexer checkpoint instead of re-lexing from line 1
+    for d in check_file(path, start_line, end_line, checks=('tags',)):
+        print(d.message)
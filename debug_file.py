@@ -1,19 +1,15 @@
-import os
+from jsx_tools.corruption import print_findings, scan_file
+from jsx_tools.line_index import line_index, read_range
 
 path = r'e:\anti\okinawa\src\App.tsx'
-with open(path, 'rb') as f:
-    data = f.read()
 
-mess = b'ber) => (ocaleCompare'
-if mess in data:
-    print(f"Found mess: {mess}")
-    # Replace the whole chunk around it if possible or just the mess
-    # Based on findstr, it seems the line 2563 was partially overwritten by 4870
-    # I'll just replace the whole mess line with the correct one.
-else:
-    print("Mess not found.")
+# One streaming pass over the bytes: NUL runs, invalid UTF-8, stray control characters,
+# mixed line endings and truncated identifiers such as 'ocaleCompare' (the old "mess").
+findings, scanner = scan_file(path)
+print_findings(path, findings, scanner)
 
 # Let's try to find line 2563 and print it raw
-lines = data.splitlines()
-if len(lines) > 2562:
-    print(f"Line 2563 (raw): {lines[2562]}")
+index = line_index(path)
+if index.line_count > 2562:
+    line = read_range(path, 2563, index=index).rstrip(b'\r\n')
+    print(f"Line 2563 (raw): {line}")
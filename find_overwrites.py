@@ -0,0 +1,19 @@
+import sys
+
+from jsx_tools import profile
+from jsx_tools.overwrite import find_overwrites, print_overwrites, repair_stub
+
+if __name__ == '__main__':
+    profile.from_argv()
+    # Lines whose tail was clobbered by bytes from another line (the 2563 / 4870 damage).
+    # --stub prints a fix_file.py-style splice_lines() script to finish by hand.
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    path = args[0] if args else r'e:\anti\okinawa\src\App.tsx'
+    with open(path, 'rb') as f:
+        data = f.read()
+    hits = find_overwrites(data)
+    print_overwrites(path, data, hits)
+    if hits and '--stub' in sys.argv:
+        print()
+        print(repair_stub(path, data, hits))
+    sys.exit(1 if hits else 0)
@@ -1,14 +1,18 @@
-import os
+from jsx_tools.line_index import line_index, splice_lines
 
 path = r'e:\anti\okinawa\src\App.tsx'
-with open(path, 'rb') as f:
-    lines = f.readlines()
 
-# Index 2562 is line 2563
-lines[2562] = b'                                                const uniqueKeys = Array.from(new Set(groupKeys)).sort((a, b) => b.localeCompare(a));\r\n'
-# Index 4869 is line 4870
-lines[4869] = b'                                                            {[...plannerData.accommodations].sort((a, b) => a.startDate.localeCompare(b.startDate)).map((acc: any, idx: number) => (\r\n'
-
-with open(path, 'wb') as f:
-    f.writelines(lines)
-print("File fixed.")
+# Seek straight to the two damaged lines instead of reading the whole file into a list;
+# lines the file does not reach (a shorter, already edited App.tsx) are left alone
+good = {
+    2563: b'                                                const uniqueKeys = Array.from(new Set(groupKeys)).sort((a, b) => b.localeCompare(a));\r\n',
+    4870: b'                                                            {[...plannerData.accommodations].sort((a, b) => a.startDate.localeCompare(b.startDate)).map((acc: any, idx: number) => (\r\n',
+}
+index = line_index(path)
+for line in good:
+    if line > index.line_count:
+        print(f"Line {line} is past the end ({index.line_count} lines), left alone.")
+fixes = {line: text for line, text in good.items() if line <= index.line_count}
+if fixes:
+    splice_lines(path, fixes, index)
+    print("File fixed.")
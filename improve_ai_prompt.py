@@ -1,9 +1,12 @@
-import re
-import os
+from jsx_tools import profile
+from jsx_tools.anchors import Through
+from jsx_tools.patch import Patch
+
+profile.from_argv()
 
 path = r'e:\anti\okinawa\src\App.tsx'
-with open(path, 'r', encoding='utf-8') as f:
-    content = f.read()
+# All anchors are checked against the file as loaded; it is written once, or not at all
+patch = Patch(path)
 
 # Improve the AI generation prompt to be more hotel-centric and route-optimized
 improvement = """
@@ -16,9 +19,11 @@ improvement = """
 """
 
 # Replace the previous block
-content = re.sub(r'- Preferred Accommodations \(Already Booked\):.*?- Travel Pace: \$\{plannerData\.pace\}.*?\)', improvement, content, flags=re.DOTALL)
+# Inside the prompt template literal: from the accommodations line through the end of the pace line
+patch.replace(Through('- Preferred Accommodations (Already Booked):', '- Travel Pace: ${plannerData.pace}', ')'), improvement,
+              count=None)
 
-with open(path, 'w', encoding='utf-8') as f:
-    f.write(content)
+patch.apply()
+patch.report()
 
 print("Successfully improved AI generation prompt.")
@@ -0,0 +1 @@
+# Shared helpers for the App.tsx maintenance scripts (checkers, patchers, repair tools).
@@ -0,0 +1,181 @@
+from bisect import bisect_left
+from collections import Counter, namedtuple
+
+from jsx_tools.corruption import CorruptionScanner
+from jsx_tools.line_index import splice_lines
+from jsx_tools.overwrite import WORD_RE, find_overwrites
+
+# Line alignment of a damaged file against its backup (src_backup_okinawa), and repair
+# of the hunks that look corrupted rather than edited. Lines are interned to ints once,
+# so the diff compares ints; anchors are lines unique on both sides (patience diff),
+# with the rarest common line as a fallback anchor (histogram diff) where there are none.
+# Cost is about O(n log n) for ordinary files, unlike difflib's quadratic worst case.
+
+# Line numbers are 1-based; start..end is inclusive-exclusive on the damaged file,
+# backup_start..backup_end on the backup. reasons: why the hunk looks corrupted.
+Hunk = namedtuple('Hunk', 'start end backup_start backup_end reasons')
+
+
+def split_lines(data):
+    # Lines with their endings, like bytes.splitlines(keepends=True) but '\n' only
+    lines = data.split(b'\n')
+    tail = lines.pop()
+    lines = [line + b'\n' for line in lines]
+    if tail:
+        lines.append(tail)
+    return lines
+
+
+def intern_lines(*files):
+    # One list of ints per file; equal lines (ignoring the line ending) get equal ints
+    ids = {}
+    return [[ids.setdefault(line.rstrip(b'\r\n'), len(ids)) for line in lines] for lines in files]
+
+
+def unique_anchors(a, a0, a1, b, b0, b1):
+    # Patience: lines occurring once in a[a0:a1] and once in b[b0:b1], reduced to their
+    # longest increasing run of b positions
+    count_a = Counter(a[a0:a1])
+    count_b = Counter(b[b0:b1])
+    pos_b = {x: j for j, x in enumerate(b[b0:b1], b0) if count_b[x] == 1}
+    pairs = [(i, pos_b[x]) for i, x in enumerate(a[a0:a1], a0) if count_a[x] == 1 and x in pos_b]
+    if not pairs:
+        # histogram: the rarest line the two ranges share, first occurrence on each side
+        common = [x for x in count_a if x in count_b]
+        if not common:
+            return []
+        x = min(common, key=lambda x: (count_a[x] + count_b[x], x))
+        return [(a.index(x, a0, a1), b.index(x, b0, b1))]
+    # longest increasing subsequence of the b positions (patience sorting)
+    tops = []
+    top_ids = []
+    back = [-1] * len(pairs)
+    for k, (_, j) in enumerate(pairs):
+        p = bisect_left(tops, j)
+        if p:
+            back[k] = top_ids[p - 1]
+        if p == len(tops):
+            tops.append(j)
+            top_ids.append(k)
+        else:
+            tops[p] = j
+            top_ids[p] = k
+    run = []
+    k = top_ids[-1]
+    while k != -1:
+        run.append(pairs[k])
+        k = back[k]
+    return run[::-1]
+
+
+def matching_lines(a, b):
+    # Sorted (i, j) pairs with a[i] == b[j], forming a common subsequence
+    matches = []
+    todo = [(0, len(a), 0, len(b))]
+    while todo:
+        a0, a1, b0, b1 = todo.pop()
+        while a0 < a1 and b0 < b1 and a[a0] == b[b0]:
+            matches.append((a0, b0))
+            a0 += 1
+            b0 += 1
+        while a0 < a1 and b0 < b1 and a[a1 - 1] == b[b1 - 1]:
+            a1 -= 1
+            b1 -= 1
+            matches.append((a1, b1))
+        if a0 == a1 or b0 == b1:
+            continue
+        i, j = a0, b0
+        for ai, bj in unique_anchors(a, a0, a1, b, b0, b1):
+            matches.append((ai, bj))
+            todo.append((i, ai, j, bj))
+            i, j = ai + 1, bj + 1
+        if (i, j) != (a0, b0):
+            todo.append((i, a1, j, b1))
+    matches.sort()
+    return matches
+
+
+def opcodes(a, b):
+    # difflib-style ('equal' | 'replace' | 'delete' | 'insert', i1, i2, j1, j2), 0-based
+    result = []
+    i = j = 0
+    for ai, bj in matching_lines(a, b) + [(len(a), len(b))]:
+        if ai > i or bj > j:
+            tag = 'replace' if ai > i and bj > j else 'delete' if ai > i else 'insert'
+            result.append((tag, i, ai, j, bj))
+        if ai < len(a):
+            if result and result[-1][0] == 'equal':
+                result[-1] = ('equal', result[-1][1], ai + 1, result[-1][3], bj + 1)
+            else:
+                result.append(('equal', ai, ai + 1, bj, bj + 1))
+        i, j = ai + 1, bj + 1
+    return result
+
+
+def suspicious_lines(data, lines=None):
+    # {line: reason} from the corruption scanner (NULs, invalid UTF-8, control characters,
+    # truncated identifiers) and the overwrite detector; lines: the ones worth a reason
+    # (default all), so a few hunks of a big file do not cost a per-line pass over all of it
+    scanner = CorruptionScanner()
+    scanner.feed(data)
+    reasons = {}
+    for f in scanner.finish():
+        if f.kind != 'newlines':
+            reasons.setdefault(f.line, f.message)
+    fragments = {fragment for fragment, _ in scanner.truncated()}
+    if fragments:
+        all_lines = split_lines(data)
+        for n in sorted(lines) if lines is not None else range(1, len(all_lines) + 1):
+            for word in WORD_RE.findall(all_lines[n - 1]):
+                if word in fragments:
+                    reasons.setdefault(n, f"truncated identifier '{word.decode()}'")
+    for hit in find_overwrites(data, victims=lines):
+        reasons.setdefault(hit.victim, f"tail overwritten by line {hit.source}")
+    return reasons
+
+
+def corrupted_hunks(data, backup):
+    # (hunks to restore from the backup, number of differing hunks left alone as edits)
+    lines = split_lines(data)
+    a, b = intern_lines(lines, split_lines(backup))
+    diff = [op for op in opcodes(a, b) if op[0] != 'equal']
+    # only replaced lines can be restored, so only they need a reason
+    reasons = suspicious_lines(data, {n for tag, i1, i2, _, _ in diff if tag == 'replace'
+                                      for n in range(i1 + 1, i2 + 1)})
+    hunks = []
+    kept = 0
+    for tag, i1, i2, j1, j2 in diff:
+        why = [reasons[n] for n in range(i1 + 1, i2 + 1) if n in reasons]
+        if why and tag == 'replace':
+            hunks.append(Hunk(i1 + 1, i2 + 1, j1 + 1, j2 + 1, why))
+        else:
+            kept += 1
+    return hunks, kept
+
+
+def restore_hunks(path, data, backup, hunks):
+    # Splice the backup's lines over each hunk, in the damaged file's line-ending style
+    newline = b'\r\n' if data.count(b'\r\n') * 2 > data.count(b'\n') else b'\n'
+    old = split_lines(backup)
+    replacements = {}
+    for h in hunks:
+        restored = [line.rstrip(b'\r\n') + newline for line in old[h.backup_start - 1:h.backup_end - 1]]
+        replacements[(h.start, h.end - 1)] = b''.join(restored)
+    splice_lines(path, replacements)
+
+
+def show(line):
+    return line.rstrip(b'\r\n').decode('utf-8', 'replace').replace('\x00', '\\0')
+
+
+def print_hunks(path, data, backup, hunks, kept):
+    lines = split_lines(data)
+    old = split_lines(backup)
+    for h in hunks:
+        print(f"{path}:{h.start}-{h.end - 1}: restore backup lines {h.backup_start}-{h.backup_end - 1} "
+              f"({'; '.join(h.reasons)})")
+        for line in lines[h.start - 1:h.end - 1]:
+            print('  - ' + show(line))
+        for line in old[h.backup_start - 1:h.backup_end - 1]:
+            print('  + ' + show(line))
+    print(f"{len(hunks)} corrupted hunk(s), {kept} other difference(s) kept as edits.")
@@ -0,0 +1,227 @@
+import re
+from bisect import bisect_left, bisect_right
+
+from jsx_tools.elements import ElementIndex
+from jsx_tools.lexer import OPEN, CLOSE, STRING, TEMPLATE, COMMENT, REGEX
+from jsx_tools.profile import current as profile
+from jsx_tools.tokens import CODES, token_store
+
+# Structural anchors for Patch: each resolves to a list of (start, end) spans from one
+# lexer pass over the text (shared by all anchors of a patch through Document), instead
+# of a DOTALL '.*?' regex that can backtrack over thousands of lines and quietly stop
+# at the wrong '};' or '</div>'.
+
+DECL_RE = r'\b(?:export\s+)?(?:const|let|var|function|async\s+function)\s+%s\b'
+# a newline ends a declaration unless the next line obviously continues the expression
+CONTINUES = tuple('.?:&|+-*/=,')
+MASKED_CODES = frozenset(CODES[k] for k in (STRING, TEMPLATE, COMMENT, REGEX))
+OPEN_CODE = CODES[OPEN]
+CLOSE_CODE = CODES[CLOSE]
+
+
+class Document:
+    # Lexed view of one text: masked spans (strings, comments, regexes), brackets and
+    # JSX elements, computed once on first use (build) and shared by every anchor
+
+    def __init__(self, text):
+        self.text = text
+        self.built = False
+
+    def build(self):
+        if self.built:
+            return self
+        self.built = True
+        prof = profile()
+        with prof.phase('lex'):
+            store = token_store(self.text)
+        prof.count('tokens', len(store))
+        # plain lists of offsets, read once from the store's columns
+        kinds = store.kind
+        starts = store.start
+        ends = store.end
+        self.masked = [(starts[i], ends[i]) for i, k in enumerate(kinds) if k in MASKED_CODES]
+        self.mask_starts = [a for a, _ in self.masked]
+        brackets = [i for i, k in enumerate(kinds) if k == OPEN_CODE or k == CLOSE_CODE]
+        self.bracket_starts = [starts[i] for i in brackets]
+        self.bracket_ends = [ends[i] for i in brackets]
+        self.bracket_opens = [kinds[i] == OPEN_CODE for i in brackets]
+        with prof.phase('index'):
+            self.elements = ElementIndex.build(self.text, store)
+        return self
+
+    def is_masked(self, pos):
+        i = bisect_right(self.mask_starts, pos) - 1
+        return i >= 0 and self.masked[i][0] <= pos < self.masked[i][1]
+
+    def statement_end(self, pos):
+        # End of the statement starting at pos: first ';' at bracket depth 0, or a
+        # newline at depth 0 once something was closed and the next line does not continue it
+        text = self.text
+        i = bisect_left(self.bracket_starts, pos)
+        depth = 0
+        closed = False
+        scan = pos
+        while True:
+            limit = self.bracket_starts[i] if i < len(self.bracket_starts) else len(text)
+            if depth == 0:
+                end = self._terminator(scan, limit, closed)
+                if end is not None:
+                    return end
+            if i >= len(self.bracket_starts):
+                return len(text)
+            depth += 1 if self.bracket_opens[i] else -1
+            if depth < 0:
+                return self.bracket_starts[i]  # the enclosing block closed first
+            closed = closed or depth == 0
+            scan = self.bracket_ends[i]
+            i += 1
+
+    def _terminator(self, a, b, closed):
+        text = self.text
+        while a < b:
+            semi = text.find(';', a, b)
+            nl = text.find('\n', a, b) if closed else -1
+            if semi == -1 and nl == -1:
+                return None
+            if semi != -1 and (nl == -1 or semi < nl):
+                if not self.is_masked(semi):
+                    return semi + 1
+                a = semi + 1
+                continue
+            rest = text[nl + 1:nl + 200].lstrip()
+            if not self.is_masked(nl) and not rest.startswith(CONTINUES):
+                return nl
+            a = nl + 1
+        return None
+
+
+def loose(literal):
+    # Literal whose whitespace runs match any whitespace (linear: no wildcards)
+    parts = literal.split()
+    return re.compile(r'\s+'.join(re.escape(p) for p in parts))
+
+
+class Anchor:
+    def spans(self, doc):
+        raise NotImplementedError
+
+    def __repr__(self):
+        args = ', '.join(f"{k}={v!r}" for k, v in vars(self).items()
+                         if not k.startswith('_') and v not in (None, ()))
+        return f"{type(self).__name__}({args})"
+
+
+class Declaration(Anchor):
+    # The const/let/function declaration named `name`, through its terminating ';'
+
+    def __init__(self, name):
+        self.name = name
+
+    def spans(self, doc):
+        doc.build()
+        pattern = re.compile(DECL_RE % re.escape(self.name))
+        return [(m.start(), doc.statement_end(m.end()))
+                for m in pattern.finditer(doc.text) if not doc.is_masked(m.start())]
+
+
+class Element(Anchor):
+    # A JSX element (opening tag through closing tag) by tag name, literals its opening
+    # tag must contain and a literal its body must contain. Whitespace in literals is loose.
+    # With `contains`, each occurrence picks its nearest enclosing element that fits.
+
+    def __init__(self, tag=None, attrs=(), contains=None):
+        self.tag = tag
+        self.attrs = (attrs,) if isinstance(attrs, str) else tuple(attrs)
+        self.contains = contains
+        self._attrs = [loose(a) for a in self.attrs]
+
+    def _fits(self, doc, e):
+        if self.tag is not None and e.tag != self.tag:
+            return False
+        return all(a.search(doc.text, e.start, e.open_end) for a in self._attrs)
+
+    def elements(self, doc):
+        doc.build()
+        index = doc.elements
+        if self.contains is None:
+            return [e for e in index.elements if self._fits(doc, e)]
+        found = {}
+        for m in loose(self.contains).finditer(doc.text):
+            e = index.at(m.start())
+            while e is not None and not (m.end() <= e.end and self._fits(doc, e)):
+                e = index[e.parent] if e.parent != -1 else None
+            if e is not None:
+                found[e.index] = e
+        return [found[i] for i in sorted(found)]
+
+    def spans(self, doc):
+        return [(e.start, e.end) for e in self.elements(doc)]
+
+
+class ClosingTag(Anchor):
+    # The closing tag of each element whose opening tag starts where `opener` matches
+
+    def __init__(self, opener):
+        self.opener = opener
+
+    def spans(self, doc):
+        doc.build()
+        result = []
+        index = doc.elements
+        for a, _ in resolve(doc, self.opener):
+            e = index.at(a)
+            if e is not None and e.start == a and e.close_start < e.end:
+                result.append((e.close_start, e.end))
+        return result
+
+
+class Through(Anchor):
+    # From each match of the first anchor through the next match of every following one,
+    # e.g. Through('{/* Key Items */}', Element('section')): a comment and the element after it
+
+    def __init__(self, *parts):
+        self.parts = parts
+
+    def spans(self, doc):
+        resolved = [sorted(resolve(doc, p)) for p in self.parts]
+        result = []
+        for start, end in resolved[0]:
+            for spans in resolved[1:]:
+                i = bisect_left(spans, (end, end))
+                if i == len(spans):
+                    break
+                end = spans[i][1]
+            else:
+                result.append((start, end))
+        return result
+
+
+class At(Anchor):
+    # A span the caller computed from the same text (e.g. with an ElementIndex); it only
+    # matches if the text there is still `expect`, so a file edited in between is refused
+
+    def __init__(self, start, end, expect):
+        self.start = start
+        self.end = end
+        self.expect = expect
+
+    def spans(self, doc):
+        return [(self.start, self.end)] if doc.text[self.start:self.end] == self.expect else []
+
+    def __repr__(self):
+        return f"At({self.start}, {self.end})"
+
+
+def resolve(doc, anchor):
+    # Spans of a literal str, a compiled regex or an Anchor
+    if isinstance(anchor, Anchor):
+        return anchor.spans(doc)
+    text = doc.text
+    if isinstance(anchor, str):
+        spans = []
+        pos = text.find(anchor)
+        while pos != -1:
+            spans.append((pos, pos + len(anchor)))
+            pos = text.find(anchor, pos + len(anchor))
+        return spans
+    return [m.span() for m in anchor.finditer(text)]
@@ -0,0 +1,283 @@
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from jsx_tools import cache
+
+# Benchmarks for the checkers and patch tooling on synthetic App.tsx-like files. Every
+# benchmark runs against a fresh, empty cache (cold) unless its name ends in '.warm'.
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+GENERATOR_VERSION = 1
+RESULTS_VERSION = 2
+THRESHOLD = 0.25      # fail when a benchmark is this much slower than the baseline...
+NOISE_SECONDS = 0.005  # ...and slower by more than this (tiny timings jitter)
+
+TAGS = ('div', 'section', 'span', 'p', 'motion.div', 'button', 'label', 'li')
+STYLES = (
+    "display: 'flex', gap: 12, alignItems: 'center'",
+    "padding: '12px 16px', borderRadius: 12, background: 'var(--glass-bg)'",
+    "fontSize: 13, color: 'var(--text-secondary)', marginTop: 4",
+    "flex: 1, minWidth: 0, overflow: 'hidden', textOverflow: 'ellipsis'",
+)
+TEXTS = ('여행 일정', '숙소 정보', '오늘의 날씨', '렌터카 예약', '추천 관광지', '메모를 남겨주세요', 'Day', 'Check-in')
+
+
+class Corpus:
+    # Deterministic generator of a component file of about `lines` lines: nested JSX with
+    # inline style objects, Korean text, template literals, regexes, comments, self-closing
+    # tags, `{cond && (` / `.map(... => (` wrappers and the odd minified line
+
+    def __init__(self, lines, seed=0):
+        self.target = lines
+        self.rng = random.Random(seed)
+        self.out = []
+
+    def emit(self, indent, text):
+        self.out.append(' ' * indent + text)
+
+    def attrs(self):
+        rng = self.rng
+        parts = []
+        if rng.random() < 0.7:
+            parts.append(f"style={{{{ {rng.choice(STYLES)} }}}}")
+        if rng.random() < 0.2:
+            parts.append("onClick={(e) => toggleComplete(p.id, e)}")
+        if rng.random() < 0.3:
+            parts.append(f'className="card-{rng.randrange(20)}"')
+        return (' ' + ' '.join(parts)) if parts else ''
+
+    def leaf(self, indent):
+        rng = self.rng
+        kind = rng.randrange(6)
+        if kind == 0:
+            self.emit(indent, f"<span{self.attrs()}>{rng.choice(TEXTS)} {rng.randrange(100)}</span>")
+        elif kind == 1:
+            self.emit(indent, "<div>{`${p.name} · ${p.time ?? '미정'}`}</div>")
+        elif kind == 2:
+            self.emit(indent, f'<img src="/img/{rng.randrange(50)}.png" alt="{rng.choice(TEXTS)}" />')
+        elif kind == 3:
+            self.emit(indent, f"{{/* {rng.choice(TEXTS)} */}}")
+        elif kind == 4:
+            self.emit(indent, "<input type=\"text\" value={memo} onChange={(e) => setMemo(e.target.value)} />")
+        else:
+            self.emit(indent, f"<p>{{p.note?.replace(/\\s+/g, ' ') || '{rng.choice(TEXTS)}'}}</p>")
+
+    def minified(self, indent):
+        rng = self.rng
+        items = ''.join(f"<li key=\"{i}\" style={{{{ {rng.choice(STYLES)} }}}}>{rng.choice(TEXTS)}</li>"
+                        for i in range(rng.randrange(10, 40)))
+        self.emit(indent, f"<ul>{items}</ul>")
+
+    def element(self, indent, depth):
+        rng = self.rng
+        if depth == 0 or rng.random() < 0.25:
+            self.leaf(indent)
+            return
+        if rng.random() < 0.02:
+            self.minified(indent)
+            return
+        wrap = rng.randrange(5)
+        inner = indent
+        if wrap == 0:
+            self.emit(indent, "{isOpen && (")
+            inner += 4
+        elif wrap == 1:
+            self.emit(indent, "{points.map((p, idx) => (")
+            inner += 4
+        tag = rng.choice(TAGS)
+        self.emit(inner, f"<{tag}{self.attrs()}>")
+        for _ in range(rng.randrange(1, 4)):
+            self.element(inner + 4, depth - 1)
+        self.emit(inner, f"</{tag}>")
+        if wrap == 0:
+            self.emit(indent, ")}")
+        elif wrap == 1:
+            self.emit(indent, "))}")
+
+    def generate(self):
+        emit = self.emit
+        emit(0, "import React, { useState } from 'react';")
+        emit(0, "import { motion, AnimatePresence } from 'framer-motion';")
+        emit(0, "")
+        emit(0, "const App = () => {")
+        emit(4, "const [points, setPoints] = useState<any[]>([]);")
+        emit(4, "const [memo, setMemo] = useState('');")
+        emit(4, "const isOpen = points.length > 0;")
+        emit(4, "const handleReorder = (newOrder: any[]) => {")
+        emit(8, "setPoints(newOrder.filter(p => /^[a-z0-9-]+$/i.test(p.id)));")
+        emit(4, "};")
+        emit(4, "const toggleComplete = (id: string, e: any) => {")
+        emit(8, "e.stopPropagation();")
+        emit(8, "console.log(`toggle ${id}: ${'{'}`);")
+        emit(4, "};")
+        emit(0, "")
+        emit(4, "return (")
+        emit(8, "<ErrorBoundary>")
+        emit(12, '<div className="app-container">')
+        while len(self.out) < self.target - 8:
+            self.element(16, 6)
+        emit(12, "</div>")
+        emit(8, "</ErrorBoundary>")
+        emit(4, ");")
+        emit(0, "};")
+        emit(0, "")
+        emit(0, "export default App;")
+        return '\n'.join(self.out) + '\n'
+
+
+def generate(lines, seed=0):
+    return Corpus(lines, seed).generate()
+
+
+def bench_check_balance(path, text):
+    from jsx_tools.checks import check_file
+    return check_file(path, checks=('brackets',))
+
+
+def bench_triage(path, text):
+    from jsx_tools.depth import triage
+    with open(path, 'rb') as f:
+        return triage(f.read())
+
+
+def bench_check_jsx(path, text):
+    from jsx_tools.checks import check_file
+    return check_file(path, checks=('tags',))
+
+
+def bench_v3(path, text):
+    from jsx_tools.checks import VOID_TAGS, check_file
+    return check_file(path, checks=('tags',), ignore_tags=VOID_TAGS)
+
+
+def bench_v4(path, text):
+    # check_balance_v4 checks tags only
+    from jsx_tools.checks import check_file
+    return check_file(path, checks=('tags',))
+
+
+def bench_anchors(path, text):
+    # The anchors the apply_* scripts use, resolved against the file (nothing written)
+    from jsx_tools.anchors import ClosingTag, Declaration, Element
+    from jsx_tools.patch import Patch
+    patch = Patch(path, precheck=False)
+    patch.insert_after(Declaration('handleReorder'), '\n')
+    patch.insert_after(Element('button', attrs='onClick={(e) => toggleComplete(p.id, e)}'), '', count=None)
+    patch.insert_before(ClosingTag('<div className="app-container">'), '')
+    patch.replace('</ErrorBoundary>', '</ErrorBoundary>')
+    return patch.plan(text)
+
+
+def bench_corruption(path, text):
+    from jsx_tools.corruption import scan_file
+    return scan_file(path)
+
+
+def bench_tail(path, text):
+    # Rebuild the last tenth of the file
+    from jsx_tools.tail import repair_tail
+    cut = text.rfind('\n', 0, len(text) * 9 // 10) + 1
+    return repair_tail(text[:cut], trailers=('export',))
+
+
+# name -> function(path, text); '.warm' runs repeat the cold function on a primed cache
+BENCHMARKS = {
+    'check_balance': bench_check_balance,
+    'check_balance.triage': bench_triage,
+    'check_jsx': bench_check_jsx,
+    'check_balance_v3': bench_v3,
+    'check_balance_v4': bench_v4,
+    'check_balance_v4.warm': bench_v4,
+    'patch.anchors': bench_anchors,
+    'scan_file': bench_corruption,
+    'repair_tail': bench_tail,
+}
+
+
+def timed(fn, path, text, repeat, warm):
+    # Best of `repeat` runs; cold runs start from an empty cache directory each time
+    best = None
+    for _ in range(repeat):
+        if not warm:
+            shutil.rmtree(cache.CACHE_DIR, ignore_errors=True)
+        began = time.perf_counter()
+        fn(path, text)
+        seconds = time.perf_counter() - began
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def run(sizes=SIZES, names=None, repeat=3, out=print):
+    # {'<benchmark>@<lines>': seconds}; the real cache is left alone
+    results = {}
+    saved_dir = cache.CACHE_DIR
+    with tempfile.TemporaryDirectory(prefix='okinawa-bench-') as tmp:
+        cache.CACHE_DIR = os.path.join(tmp, 'cache')
+        try:
+            for lines in sizes:
+                path = os.path.join(tmp, f'App_{lines}.tsx')
+                text = generate(lines)
+                with open(path, 'w', encoding='utf-8', newline='') as f:
+                    f.write(text)
+                # big corpora get one run per benchmark; they take long enough to be stable
+                reps = repeat if lines <= 100_000 else 1
+                for name, fn in BENCHMARKS.items():
+                    if names and name not in names:
+                        continue
+                    warm = name.endswith('.warm')
+                    if warm:
+                        fn(path, text)  # prime the cache
+                    seconds = timed(fn, path, text, reps, warm)
+                    results[f"{name}@{lines}"] = seconds
+                    out(f"{name:24s} {lines:>9,d} lines  {seconds * 1000:10.1f} ms")
+        finally:
+            cache.CACHE_DIR = saved_dir
+    return results
+
+
+def to_json(results):
+    return {
+        'version': RESULTS_VERSION,
+        'generator': GENERATOR_VERSION,
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+def save(path, results):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(to_json(results), f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(tmp, path)
+
+
+def load(path):
+    # results dict of a saved run, or None if missing or from another generator
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get('version') != RESULTS_VERSION or data.get('generator') != GENERATOR_VERSION:
+        return None
+    return data['results']
+
+
+def regressions(results, baseline, threshold=THRESHOLD):
+    # [(key, baseline seconds, seconds)] for every benchmark slower than allowed
+    slow = []
+    for key, seconds in sorted(results.items()):
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if seconds > base * (1 + threshold) and seconds - base > NOISE_SECONDS:
+            slow.append((key, base, seconds))
+    return slow
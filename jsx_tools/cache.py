@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+# Local on-disk cache shared by the tools; override with OKINAWA_CACHE_DIR
+CACHE_DIR = os.environ.get('OKINAWA_CACHE_DIR') or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.okinawa-cache')
+# prune() drops least recently used entries beyond this; override with OKINAWA_CACHE_MAX_MB
+MAX_BYTES = int(os.environ.get('OKINAWA_CACHE_MAX_MB') or 256) << 20
+# Temp files older than this are leftovers from a killed writer
+STALE_TMP_NS = 3600 * 10**9
+
+
+def content_hash(data):
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def path_key(path):
+    return content_hash(os.path.normcase(os.path.abspath(path)))
+
+
+def entry_path(namespace, key, ext='.json'):
+    return os.path.join(CACHE_DIR, namespace, key + ext)
+
+
+def write_atomic(path, data):
+    # Unique temp name per writer: pool workers and concurrent tools may store the
+    # same key at once, and a shared name would let one rename away the other's file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def touch(path):
+    # Loads bump the entry's mtime, which is what prune() orders by
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def load_json(namespace, key):
+    path = entry_path(namespace, key)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            obj = json.load(f)
+    except (OSError, ValueError):
+        return None
+    touch(path)
+    return obj
+
+
+def save_json(namespace, key, obj):
+    write_atomic(entry_path(namespace, key), json.dumps(obj, ensure_ascii=False).encode('utf-8'))
+
+
+def load_bytes(namespace, key, ext='.bin'):
+    path = entry_path(namespace, key, ext)
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    touch(path)
+    return data
+
+
+def save_bytes(namespace, key, data, ext='.bin'):
+    write_atomic(entry_path(namespace, key, ext), data)
+
+
+def file_hash(path):
+    # Content hash of a file; re-hashed only when its size or mtime changed
+    st = os.stat(path)
+    key = path_key(path)
+    memo = load_json('stat', key)
+    if memo and memo['size'] == st.st_size and memo['mtime_ns'] == st.st_mtime_ns:
+        return memo['hash']
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    digest = h.hexdigest()
+    save_json('stat', key, {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'hash': digest})
+    return digest
+
+
+def prune(max_bytes=MAX_BYTES):
+    # Least-recently-used eviction: delete the oldest entries until the cache fits.
+    # Safe to race with other processes; whoever loses a delete just moves on.
+    entries = []
+    total = 0
+    now = time.time_ns()
+    for dirpath, _, filenames in os.walk(CACHE_DIR):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            # In-flight writes belong to their writer; only reclaim ones left by a crash
+            if name.endswith('.tmp') and now - st.st_mtime_ns < STALE_TMP_NS:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, path))
+            total += st.st_size
+    if total <= max_bytes:
+        return 0
+    removed = 0
+    for _, size, path in sorted(entries):
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        removed += 1
+        total -= size
+        if total <= max_bytes:
+            break
+    return removed
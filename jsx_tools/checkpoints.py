@@ -0,0 +1,283 @@
+import re
+from collections import Counter, namedtuple
+
+from jsx_tools.cache import content_hash, load_json, path_key, save_json
+from jsx_tools.checks import Diagnostic, make_checkers, record_checkers, run_checkers
+from jsx_tools.lexer import Lexer, shift_frames
+from jsx_tools.profile import current as profile
+from jsx_tools.tokens import TokenStore
+
+CHECKPOINT_EVERY = 200
+VERSION = 4
+
+# lexer: Lexer.state() at the start of `line`
+# stacks / counts: each default checker's open stack and number of diagnostics so far
+# kinds: tokens emitted so far, per kind
+Checkpoint = namedtuple('Checkpoint', 'line pos lexer stacks counts kinds')
+
+_block_patterns = {}
+
+
+def block_offsets(text, every=CHECKPOINT_EVERY):
+    # Start offset of each block of `every` lines
+    pattern = _block_patterns.get(every)
+    if pattern is None:
+        pattern = _block_patterns[every] = re.compile(r'(?:[^\n]*\n){%d}' % every)
+    offsets = [0]
+    while True:
+        m = pattern.match(text, offsets[-1])
+        if not m or m.end() >= len(text):
+            return offsets
+        offsets.append(m.end())
+
+
+def block_hashes(text, offsets):
+    bounds = offsets + [len(text)]
+    return [content_hash(text[bounds[i]:bounds[i + 1]]) for i in range(len(offsets))]
+
+
+def line_offset(text, line, from_pos=0, from_line=1):
+    # Offset of the first char of `line`, walking forward from a known line start
+    pos = from_pos
+    for _ in range(line - from_line):
+        pos = text.find('\n', pos)
+        if pos == -1:
+            return len(text)
+        pos += 1
+    return pos
+
+
+class CheckpointIndex:
+    # Lexer + checker state every `every` lines of one file version, plus the
+    # whole-file diagnostics of the default checkers (brackets and tags).
+
+    def __init__(self, every=CHECKPOINT_EVERY, engine='fast'):
+        self.every = every
+        self.engine = engine
+        self.hash = None
+        self.blocks = []
+        self.checkpoints = []
+        self.diagnostics = []
+        self.kinds = {}
+        self.lines = None
+
+    def update(self, text, workers=None):
+        # Re-lex from the first block that changed; returns False if nothing did.
+        # With workers > 1 a long re-lex is split over a process pool (see parallel.py).
+        digest = content_hash(text)
+        if digest == self.hash:
+            return False
+        offsets = block_offsets(text, self.every)
+        blocks = block_hashes(text, offsets)
+        resume = 0
+        while (resume < len(blocks) and resume < len(self.blocks)
+               and blocks[resume] == self.blocks[resume]):
+            resume += 1
+        resume = min(resume, max(len(self.checkpoints) - 1, 0))
+        from jsx_tools.parallel import MIN_BLOCKS
+        if workers and workers > 1 and len(offsets) - resume >= MIN_BLOCKS:
+            self._lex_parallel(text, offsets, resume, workers)
+        else:
+            self._lex(text, offsets, resume)
+        self.hash = digest
+        self.blocks = blocks
+        self.lines = text.count('\n')
+        return True
+
+    def _lex(self, text, offsets, resume):
+        lexer = Lexer(text, self.engine)
+        checkers = make_checkers()
+        kinds = Counter()
+        if resume:
+            cp = self.checkpoints[resume]
+            lexer.restore(cp.lexer)
+            for checker, stack, count in zip(checkers, cp.stacks, cp.counts):
+                checker.stack = [tuple(item) for item in stack]
+                checker.diagnostics = [d for d in self.diagnostics if d.check == checker.name][:count]
+            kinds.update(cp.kinds)
+        checkpoints = self.checkpoints[:resume]
+        prof = profile()
+        lexed = sum(kinds.values())
+        for offset in offsets[resume:]:
+            with prof.phase('lex'):
+                lexer.run(offset)
+            with prof.phase('match'):
+                self._feed(lexer, checkers, kinds)
+            checkpoints.append(Checkpoint(
+                lexer.line, lexer.pos, lexer.state(),
+                [list(c.stack) for c in checkers], [len(c.diagnostics) for c in checkers],
+                dict(kinds)))
+        with prof.phase('lex'):
+            lexer.run()
+            lexer.finish()
+        with prof.phase('match'):
+            self._feed(lexer, checkers, kinds)
+        self.checkpoints = checkpoints
+        self.diagnostics = [d for c in checkers for d in c.finish()]
+        self.kinds = dict(kinds)
+        prof.count('blocks_relexed', len(offsets) - resume)
+        record_checkers(checkers, sum(kinds.values()) - lexed)
+
+    def _guesses(self, text, offsets, resume):
+        # {offset: lexer state} to start parallel chunks from after offsets[resume]: the
+        # old checkpoints moved by the change in line count (an edit that inserted 3 lines
+        # leaves the state 3 lines further down as it was), else guessed from indentation
+        guesses = {}
+        shift = text.count('\n') - self.lines if self.lines is not None else None
+        for cp in self.checkpoints[resume + 1:] if shift is not None else ():
+            line = cp.line + shift
+            if line <= resume * self.every + 1 or (line - 1) // self.every >= len(offsets):
+                continue
+            block = (line - 1) // self.every
+            pos = line_offset(text, line, offsets[block], block * self.every + 1)
+            if pos < len(text):
+                _, _, frames = cp.lexer
+                guesses[pos] = (pos, line, tuple(shift_frames([tuple(f) for f in frames], pos - cp.pos)))
+        if not guesses:
+            from jsx_tools.parallel import guess_states
+            guesses = guess_states(text, offsets[resume + 1:])
+        return guesses
+
+    def _lex_parallel(self, text, offsets, resume, workers):
+        # Same checkpoints and diagnostics as _lex, from per-segment summaries folded in order
+        from jsx_tools.parallel import EMPTY, Summary, finish, merge, scan
+        if resume:
+            cp = self.checkpoints[resume]
+            state = cp.lexer
+            prefix = []
+            for checker, stack, count in zip(make_checkers(), cp.stacks, cp.counts):
+                seen = [d for d in self.diagnostics if d.check == checker.name][:count]
+                prefix.append(Summary([(-1, d) for d in seen], [], [tuple(item) for item in stack]))
+            kinds = Counter(cp.kinds)
+        else:
+            cp = None
+            state = Lexer(text, self.engine).state()
+            prefix = [EMPTY for _ in make_checkers()]
+            kinds = Counter()
+        checkpoints = self.checkpoints[:resume]
+        checkpoints.append(cp or Checkpoint(1, 0, state, [[] for _ in prefix], [0 for _ in prefix], {}))
+        guesses = self._guesses(text, offsets, resume)
+        blocks = set(offsets[resume + 1:])
+        ends = sorted(blocks | set(guesses)) + [None]
+        prof = profile()
+        lexed = sum(kinds.values())
+        with prof.phase('lex'):
+            segments = scan(text, state, ends, guesses, self.engine, workers)
+        with prof.phase('match'):
+            summaries = prefix
+            depths = [0 for _ in prefix]
+            for end, segment in zip(ends, segments):
+                kinds.update(segment.kinds)
+                # the deepest stack each checker would have reached, as in _lex
+                depths = [depth if rise is None else max(depth, len(a.stack) + rise, top)
+                          for depth, a, (top, rise) in zip(depths, summaries, segment.peaks)]
+                summaries = [merge(a, b, checker)
+                             for a, b, checker in zip(summaries, segment.summaries, make_checkers())]
+                if end in blocks:
+                    pos, line, _ = segment.state
+                    checkpoints.append(Checkpoint(
+                        line, pos, segment.state, [list(s.stack) for s in summaries],
+                        [len(s.diagnostics) + len(s.closers) for s in summaries], dict(kinds)))
+            checkers = make_checkers()
+            self.diagnostics = [d for s, c in zip(summaries, checkers) for d in finish(s, c)]
+        self.checkpoints = checkpoints
+        self.kinds = dict(kinds)
+        prof.count('blocks_relexed', len(offsets) - resume)
+        prof.count('tokens', sum(kinds.values()) - lexed)
+        for checker, depth in zip(checkers, depths):
+            prof.peak(f"max_depth.{checker.name}", depth)
+        # time the segments took in the workers (overlapping, so not phases of this process)
+        prof.count('worker_seconds.lex', sum(segment.seconds[0] for segment in segments))
+        prof.count('worker_seconds.match', sum(segment.seconds[1] for segment in segments))
+
+    @staticmethod
+    def _feed(lexer, checkers, kinds):
+        # One block's tokens at a time, so lexer.tokens stays a plain list: a TokenStore
+        # here (as in check_range) saves no memory and its append() costs about 20%
+        for tok in lexer.tokens:
+            kinds[tok.kind] += 1
+            for checker in checkers:
+                checker.feed(tok)
+        lexer.tokens = []
+
+    def nearest(self, line):
+        i = min(max(line - 1, 0) // self.every, len(self.checkpoints) - 1)
+        return self.checkpoints[i]
+
+    def check_range(self, text, start_line, end_line, checks=('brackets', 'tags'), ignore_tags=()):
+        # Same semantics as run_checkers over a line range (checkers start empty at
+        # start_line), but the lexer resumes from the nearest checkpoint, so a range
+        # opening inside a template literal or comment is read correctly.
+        cp = self.nearest(start_line or 1)
+        lexer = Lexer(text, self.engine)
+        lexer.restore(cp.lexer)
+        # a wide range holds its tokens as store columns, not one tuple each
+        lexer.tokens = TokenStore()
+        prof = profile()
+        with prof.phase('lex'):
+            if end_line is not None:
+                lexer.run(line_offset(text, end_line + 1, cp.pos, cp.line))
+                # a tag opened in range may only see its '>' a few lines later
+                while lexer.pos < len(text) and any(f[0] == 'tag' for f in lexer.frames):
+                    lexer.run(line_offset(text, lexer.line + 1, lexer.pos, lexer.line))
+            if end_line is None or lexer.pos >= len(text):
+                lexer.run()
+                lexer.finish()
+        with prof.phase('match'):
+            return run_checkers(lexer.tokens.tokens(), make_checkers(checks, ignore_tags), start_line, end_line)
+
+    def to_json(self):
+        return {
+            'version': VERSION,
+            'every': self.every,
+            'hash': self.hash,
+            'blocks': self.blocks,
+            'checkpoints': [list(cp) for cp in self.checkpoints],
+            'diagnostics': [list(d) for d in self.diagnostics],
+            'kinds': self.kinds,
+            'lines': self.lines,
+        }
+
+    @classmethod
+    def from_json(cls, data, engine='fast'):
+        index = cls(data['every'], engine)
+        index.hash = data['hash']
+        index.blocks = data['blocks']
+        index.checkpoints = [Checkpoint(*cp) for cp in data['checkpoints']]
+        index.diagnostics = [Diagnostic(*d) for d in data['diagnostics']]
+        index.kinds = data['kinds']
+        index.lines = data['lines']
+        return index
+
+
+def index_key(path, engine='fast'):
+    # Indexes are kept per engine, so a reference run never resumes from fast checkpoints
+    return content_hash(repr((path_key(path), engine)))
+
+
+def load_index(path, engine='fast'):
+    data = load_json('checkpoints', index_key(path, engine))
+    if data and data.get('version') == VERSION and data.get('every') == CHECKPOINT_EVERY:
+        return CheckpointIndex.from_json(data, engine)
+    return CheckpointIndex(engine=engine)
+
+
+def snapshot(text, engine='fast'):
+    # Index of a text that is no working file (a git blob), cached by content hash and engine
+    key = content_hash(repr((content_hash(text), engine)))
+    data = load_json('snapshots', key)
+    if data and data.get('version') == VERSION and data.get('every') == CHECKPOINT_EVERY:
+        return CheckpointIndex.from_json(data, engine)
+    index = CheckpointIndex(engine=engine)
+    index.update(text)
+    save_json('snapshots', key, index.to_json())
+    return index
+
+
+def refresh(path, text, engine='fast', workers=None):
+    # Index for the current contents of path, re-lexing only what changed since the last run
+    index = load_index(path, engine)
+    if index.update(text, workers):
+        with profile().phase('write'):
+            save_json('checkpoints', index_key(path, engine), index.to_json())
+    return index
@@ -0,0 +1,223 @@
+import os
+import re
+from collections import Counter, namedtuple
+
+from jsx_tools.lexer import (
+    OPEN, CLOSE, TAG_OPEN, TAG_CLOSE, FRAG_OPEN, FRAG_CLOSE, tokenize,
+)
+from jsx_tools.cache import content_hash, file_hash
+from jsx_tools.profile import current as profile
+from jsx_tools.source import STREAM_THRESHOLD, SourceFile
+
+# check: 'brackets' or 'tags'
+Diagnostic = namedtuple('Diagnostic', 'line check message')
+
+CLOSERS = {'(': ')', '{': '}', '[': ']'}
+VOID_TAGS = frozenset(['img', 'br', 'hr', 'input', 'link', 'meta'])
+
+# TagChecker messages, for print_tag_balance()
+EXTRA_TAG_RE = re.compile(r'Extra closing tag (</[^>]*>) at line \d+$')
+MISMATCH_TAG_RE = re.compile(r'Mismatch: (<[^>]*>) at \d+ closed by (</[^>]*>) at \d+$')
+UNCLOSED_TAG_RE = re.compile(r'Unclosed tag <([^>]*)> from line \d+$')
+
+
+class BracketChecker:
+    name = 'brackets'
+
+    def __init__(self):
+        self.stack = []
+        self.diagnostics = []
+        self.max_depth = 0
+
+    def report(self, line, message):
+        self.diagnostics.append(Diagnostic(line, self.name, message))
+
+    def closes(self, tok):
+        # tok would pop this checker's stack (or be reported as extra)
+        return tok.kind == CLOSE
+
+    def feed(self, tok):
+        if tok.kind == OPEN:
+            self.stack.append((tok.value, tok.line))
+            if len(self.stack) > self.max_depth:
+                self.max_depth = len(self.stack)
+        elif tok.kind == CLOSE:
+            if not self.stack:
+                self.report(tok.line, f"Extra closing {tok.value} at line {tok.line}")
+                return
+            last_char, last_line = self.stack.pop()
+            if CLOSERS[last_char] != tok.value:
+                self.report(tok.line, f"Mismatch: {last_char} at {last_line} closed by {tok.value} at {tok.line}")
+
+    def finish(self):
+        for char, line in self.stack:
+            self.report(line, f"Unclosed {char} from line {line}")
+        return self.diagnostics
+
+
+class TagChecker:
+    name = 'tags'
+
+    def __init__(self, ignore=()):
+        self.ignore = frozenset(ignore)
+        self.stack = []
+        self.diagnostics = []
+        self.max_depth = 0
+
+    def report(self, line, message):
+        self.diagnostics.append(Diagnostic(line, self.name, message))
+
+    def closes(self, tok):
+        return tok.kind in (TAG_CLOSE, FRAG_CLOSE) and tok.value not in self.ignore
+
+    def feed(self, tok):
+        kind = tok.kind
+        if kind in (TAG_OPEN, FRAG_OPEN):
+            if tok.value not in self.ignore:
+                self.stack.append((tok.value, tok.line))
+                if len(self.stack) > self.max_depth:
+                    self.max_depth = len(self.stack)
+        elif kind in (TAG_CLOSE, FRAG_CLOSE):
+            if tok.value in self.ignore:
+                return
+            if not self.stack:
+                self.report(tok.line, f"Extra closing tag </{tok.value}> at line {tok.line}")
+                return
+            last_tag, last_line = self.stack.pop()
+            if last_tag != tok.value:
+                self.report(tok.line, f"Mismatch: <{last_tag}> at {last_line} closed by </{tok.value}> at {tok.line}")
+
+    def finish(self):
+        for tag, line in self.stack:
+            self.report(line, f"Unclosed tag <{tag}> from line {line}")
+        return self.diagnostics
+
+
+def print_tag_balance(diagnostics, balanced):
+    # Tag diagnostics in the wording of the old regex balancers (check_balance_v3/v4):
+    # stray and mismatched closers one per line, then the open tags as one list
+    unclosed = []
+    for d in diagnostics:
+        m = UNCLOSED_TAG_RE.match(d.message)
+        if m:
+            unclosed.append(m.group(1))
+            continue
+        m = EXTRA_TAG_RE.match(d.message)
+        if m:
+            print(f"Extra closing tag: {m.group(1)}")
+            continue
+        m = MISMATCH_TAG_RE.match(d.message)
+        print(f"Mismatch: {m.group(1)} closed by {m.group(2)}" if m else d.message)
+    if unclosed:
+        print("Unclosed tags:", unclosed)
+    elif not diagnostics:
+        print(balanced)
+
+
+def make_checkers(checks=('brackets', 'tags'), ignore_tags=()):
+    checkers = []
+    if 'brackets' in checks:
+        checkers.append(BracketChecker())
+    if 'tags' in checks:
+        checkers.append(TagChecker(ignore_tags))
+    return checkers
+
+
+def run_checkers(tokens, checkers, start_line=None, end_line=None):
+    # Feeds one token stream to every checker; tokens outside the line range are skipped.
+    # Tokens come out in end order (a multi-line tag after its attributes), so no early break.
+    count = 0
+    for tok in tokens:
+        count += 1
+        if start_line is not None and tok.line < start_line:
+            continue
+        if end_line is not None and tok.line > end_line:
+            continue
+        for checker in checkers:
+            checker.feed(tok)
+    diagnostics = []
+    for checker in checkers:
+        diagnostics.extend(checker.finish())
+    record_checkers(checkers, count)
+    return diagnostics
+
+
+def record_checkers(checkers, tokens):
+    prof = profile()
+    prof.count('tokens', tokens)
+    for checker in checkers:
+        prof.peak(f"max_depth.{checker.name}", checker.max_depth)
+
+
+def check_text(text, start_line=None, end_line=None, checks=('brackets', 'tags'), ignore_tags=(),
+               engine='fast'):
+    tokens = tokenize(text, engine)
+    return run_checkers(tokens, make_checkers(checks, ignore_tags), start_line, end_line)
+
+
+def check_stream(path, start_line=None, end_line=None, checks=('brackets', 'tags'), ignore_tags=(),
+                 engine='fast', kinds=None):
+    # Bounded memory: the file is memory-mapped and tokens are consumed as they are lexed.
+    # kinds, if given (a Counter), is updated with the number of tokens of each kind.
+    # Lexing and matching are interleaved here, so the whole pass is one 'lex' phase.
+    with SourceFile(path) as src, profile().phase('lex'):
+        tokens = src.iter_tokens(engine)
+        if kinds is not None:
+            tokens = _counted(tokens, kinds)
+        return run_checkers(tokens, make_checkers(checks, ignore_tags), start_line, end_line)
+
+
+def _counted(tokens, kinds):
+    for tok in tokens:
+        kinds[tok.kind] += 1
+        yield tok
+
+
+def check_file(path, start_line=None, end_line=None, checks=('brackets', 'tags'), ignore_tags=(),
+               engine='fast', stream=None, workers=None):
+    # Results are cached by content hash, so an unchanged file is only hashed (and the
+    # hash itself is memoized by size and mtime). On a miss we go through the persisted
+    # checkpoint index: after an edit only the lines from the first changed checkpoint
+    # onward are re-lexed, and ranges resume mid-file. With workers > 1 that re-lex is
+    # split over a process pool.
+    # Files above STREAM_THRESHOLD (bundles, the standalone HTML) are streamed instead,
+    # unless workers asks for the parallel scan.
+    from jsx_tools.checkpoints import refresh
+    from jsx_tools.line_index import LineIndex
+    from jsx_tools.results import load_result, result_key, save_result
+
+    prof = profile()
+    with prof.phase('hash'):
+        key = result_key(file_hash(path), start_line, end_line, checks, ignore_tags, engine)
+        cached = load_result(key)
+    if cached is not None:
+        prof.count('result_cache_hits')
+        return cached
+    if stream is None:
+        stream = os.path.getsize(path) > STREAM_THRESHOLD and not (workers and workers > 1)
+    if stream:
+        kinds = Counter()
+        diagnostics = check_stream(path, start_line, end_line, checks, ignore_tags, engine, kinds)
+        with prof.phase('write'):
+            save_result(key, file_hash(path), diagnostics, kinds)
+        return diagnostics
+    with prof.phase('read'):
+        with open(path, 'rb') as f:
+            raw = f.read()
+    prof.count('bytes_read', len(raw))
+    with prof.phase('decode'):
+        # same text open(path, 'r') would give (universal newlines)
+        content = raw.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+        digest = content_hash(raw)
+    index = refresh(path, content, engine, workers)
+    if start_line is None and end_line is None and not ignore_tags:
+        diagnostics = [d for d in index.diagnostics if d.check in checks]
+    else:
+        diagnostics = index.check_range(content, start_line, end_line, checks, ignore_tags)
+    with prof.phase('split'):
+        lines = LineIndex.build(raw)
+    with prof.phase('write'):
+        # keyed by the bytes actually checked, in case the file changed since it was hashed
+        key = result_key(digest, start_line, end_line, checks, ignore_tags, engine)
+        save_result(key, digest, diagnostics, index.kinds, lines)
+    return diagnostics
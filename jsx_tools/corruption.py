@@ -0,0 +1,165 @@
+import re
+from collections import Counter, namedtuple
+
+from jsx_tools.source import CHUNK_BYTES, SourceFile
+
+# kind: 'nul', 'utf8', 'control', 'newlines' or 'truncated'
+# severity: 'error' (patching would make it worse) or 'warning'
+Finding = namedtuple('Finding', 'line column kind severity message')
+
+NUL_RE = re.compile(rb'\x00+')
+# C0 controls other than tab/newline, DEL, and a CR that does not start a CRLF
+CONTROL_RE = re.compile(rb'[\x01-\x08\x0b\x0c\x0e-\x1f\x7f]|\r(?!\n)')
+NEWLINE_RE = re.compile(rb'\r?\n')
+IDENT_RE = re.compile(rb'[A-Za-z_$][\w$]*')
+SEVERITY = {'nul': 'error', 'utf8': 'error'}
+
+MAX_FINDINGS = 50  # per kind; past that they are only counted
+# truncated identifiers: up to MAX_CHOP leading chars lost, at least MIN_FRAGMENT left
+MAX_CHOP = 3
+MIN_FRAGMENT = 5
+
+
+class CorruptionScanner:
+    # One pass over a file's bytes, fed whole lines at a time. Memory is bounded by the
+    # chunk size plus the file's identifier vocabulary, not by the file size.
+
+    def __init__(self):
+        self.line = 1
+        self.findings = []
+        self.counts = Counter()
+        self.idents = Counter()
+        self.first_seen = {}
+        self.newline = None
+        self.newlines = Counter()
+
+    def report(self, line, column, kind, message):
+        self.counts[kind] += 1
+        if self.counts[kind] <= MAX_FINDINGS:
+            self.findings.append(Finding(line, column, kind, SEVERITY.get(kind, 'warning'), message))
+
+    def _where(self, chunk, pos):
+        # (line, 1-based byte column) of pos in the current chunk
+        line_start = chunk.rfind(b'\n', 0, pos) + 1
+        return self.line + chunk.count(b'\n', 0, pos), pos - line_start + 1
+
+    def feed(self, chunk):
+        for m in NUL_RE.finditer(chunk):
+            if self.counts['nul'] < MAX_FINDINGS:
+                line, col = self._where(chunk, m.start())
+                self.report(line, col, 'nul', f"{len(m.group())} NUL byte(s)")
+            else:
+                self.counts['nul'] += 1
+        for m in CONTROL_RE.finditer(chunk):
+            if self.counts['control'] < MAX_FINDINGS:
+                line, col = self._where(chunk, m.start())
+                self.report(line, col, 'control', f"control character {m.group()[:1]!r}")
+            else:
+                self.counts['control'] += 1
+        self._utf8(chunk)
+        self._newlines(chunk)
+        self._identifiers(chunk)
+        self.line += chunk.count(b'\n')
+
+    def _utf8(self, chunk):
+        pos = 0
+        while True:
+            try:
+                chunk[pos:].decode('utf-8')
+                return
+            except UnicodeDecodeError as e:
+                bad = pos + e.start
+                if self.counts['utf8'] >= MAX_FINDINGS:
+                    # enough detail; just count what is left
+                    rest = chunk[bad:].decode('utf-8', errors='replace')
+                    self.counts['utf8'] += max(rest.count('\ufffd'), 1)
+                    return
+                line, col = self._where(chunk, bad)
+                self.report(line, col, 'utf8', f"invalid UTF-8 {chunk[bad:pos + e.end]!r}")
+                pos += e.end
+
+    def _newlines(self, chunk):
+        crlf = chunk.count(b'\r\n')
+        lf = chunk.count(b'\n') - crlf
+        self.newlines['crlf'] += crlf
+        self.newlines['lf'] += lf
+        if not crlf and not lf:
+            return
+        uniform = 'crlf' if not lf else 'lf' if not crlf else None
+        if uniform and self.newline in (None, uniform):
+            self.newline = uniform
+            return
+        # the style changes somewhere in this chunk: find where
+        for m in NEWLINE_RE.finditer(chunk):
+            style = 'crlf' if len(m.group()) == 2 else 'lf'
+            if self.newline is not None and style != self.newline:
+                line, col = self._where(chunk, m.start())
+                self.report(line, col, 'newlines', f"{style.upper()} line after {self.newline.upper()} lines")
+            self.newline = style
+
+    def _identifiers(self, chunk):
+        idents = self.idents
+        first_seen = self.first_seen
+        line = self.line
+        last = 0
+        for m in IDENT_RE.finditer(chunk):
+            word = m.group()
+            if word not in idents:
+                line += chunk.count(b'\n', last, m.start())
+                last = m.start()
+                first_seen[word] = line
+            idents[word] += 1
+
+    def truncated(self):
+        # (fragment, full) pairs: an identifier that is another one minus its first 1-3
+        # chars, cut inside a lowercase run ('l|ocaleCompare', not 'set|Points'), and used
+        # less often than the full name (a one-off API field like 'wind_kph' next to
+        # 'maxwind_kph' is not a fragment)
+        idents = self.idents
+        candidates = {}
+        for full in idents:
+            for chop in range(1, MAX_CHOP + 1):
+                fragment = full[chop:]
+                if len(fragment) < MIN_FRAGMENT:
+                    break
+                if full[chop - 1:chop].islower() and fragment[:1].islower():
+                    candidates.setdefault(fragment, full)
+        pairs = []
+        for fragment, full in candidates.items():
+            if fragment not in idents or idents[fragment] >= idents[full]:
+                continue
+            # short all-lowercase words ('place' / 'replace') are usually real
+            if fragment.islower() and len(fragment) < 8:
+                continue
+            pairs.append((fragment, full))
+        return pairs
+
+    def finish(self):
+        for fragment, full in self.truncated():
+            self.report(self.first_seen[fragment], 0, 'truncated',
+                        f"'{fragment.decode()}' looks like a truncated '{full.decode()}' "
+                        f"({self.idents[fragment]} vs {self.idents[full]} uses)")
+        return sorted(self.findings)
+
+
+def scan_file(path, chunk_bytes=CHUNK_BYTES):
+    # Findings sorted by line; the scanner itself is returned for its counters
+    scanner = CorruptionScanner()
+    with SourceFile(path) as src:
+        for chunk in src.iter_raw_chunks(chunk_bytes):
+            scanner.feed(chunk)
+    return scanner.finish(), scanner
+
+
+def print_findings(path, findings, scanner):
+    for f in findings:
+        where = f"{f.line}:{f.column}" if f.column else f"{f.line}"
+        print(f"{path}:{where}: {f.severity}: {f.message}")
+    for kind, n in sorted(scanner.counts.items()):
+        if n > MAX_FINDINGS:
+            print(f"... {n - MAX_FINDINGS} more '{kind}' findings not shown")
+    if scanner.newlines['crlf'] and scanner.newlines['lf']:
+        print(f"{path}: warning: mixed line endings "
+              f"({scanner.newlines['crlf']} CRLF, {scanner.newlines['lf']} LF)")
+    if not findings:
+        print(f"{path}: clean")
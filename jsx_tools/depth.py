@@ -0,0 +1,195 @@
+import re
+from collections import namedtuple
+from itertools import accumulate
+
+try:
+    import numpy as np
+except ImportError:  # optional: the pure-Python path gives the same answers, only slower
+    np = None
+
+from jsx_tools.lexer import coarse_spans
+
+KINDS = ('(', '{', '[')
+OPENERS = b'({['
+CLOSERS = b')}]'
+BRACKET_RE = re.compile(rb'[(){}\[\]]')
+
+# clean: every bracket kind stays >= 0 and returns to 0, and every closer matches the
+# kind of the opener it pairs with
+# first_negative: (line, char) of the first closer with nothing to close, or None
+# unclosed: (line, char) of openers that are never closed, outermost first
+# suspect: (start_line, end_line) worth handing to the precise checker, or None
+# crossed: (line, char) of the first closer of another kind than its opener, or None
+Triage = namedtuple('Triage', 'clean first_negative unclosed suspect crossed')
+
+
+class DepthProfile:
+    # offsets[i] is the byte offset of the i-th bracket outside strings/comments,
+    # depth[i] the nesting depth right after it, chars[i] the bracket itself (kept for the
+    # profile over all kinds). NumPy arrays when available, else lists.
+
+    def __init__(self, offsets, depth, chars=None):
+        self.offsets = offsets
+        self.depth = depth
+        self.chars = chars
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @property
+    def final(self):
+        return int(self.depth[-1]) if len(self.depth) else 0
+
+    def first_negative(self):
+        # Index of the first bracket after which depth < 0, or None
+        if np is not None:
+            neg = self.depth < 0
+            return int(np.argmax(neg)) if neg.any() else None
+        return next((i for i, d in enumerate(self.depth) if d < 0), None)
+
+    def never_closed(self):
+        # Indices of openers whose level is never returned to (outermost first)
+        depth = self.depth
+        if np is not None:
+            if not len(depth):
+                return []
+            after = np.minimum.accumulate(depth[::-1])[::-1]
+            after = np.append(after[1:], np.iinfo(depth.dtype).max)
+            rising = np.diff(depth, prepend=0) > 0
+            return np.flatnonzero(rising & (depth - 1 < after)).tolist()
+        result = []
+        lowest = float('inf')
+        for i in range(len(depth) - 1, -1, -1):
+            prev = depth[i - 1] if i else 0
+            if depth[i] > prev and depth[i] - 1 < lowest:
+                result.append(i)
+            lowest = min(lowest, depth[i])
+        return result[::-1]
+
+    def first_crossed(self):
+        # (opener index, closer index) of the first pair (by closer) whose kinds differ, or
+        # None. Only meaningful when the depth never goes negative. At each level openers
+        # and closers alternate, so sorting by level (stably) puts every pair side by side.
+        depth = self.depth
+        chars = self.chars
+        if not len(depth):
+            return None
+        if np is not None:
+            closing = np.isin(chars, np.frombuffer(CLOSERS, dtype=np.uint8))
+            level = depth + closing  # an opener's level is its depth after, a closer's before
+            order = np.argsort(level, kind='stable')
+            opens, closes = order[0::2], order[1::2]
+            n = len(closes)
+            want = np.zeros(256, dtype=np.uint8)
+            want[list(OPENERS)] = list(CLOSERS)
+            bad = want[chars[opens[:n]]] != chars[closes]
+            if not bad.any():
+                return None
+            k = np.flatnonzero(bad)
+            first = k[np.argmin(closes[k])]
+            return int(opens[first]), int(closes[first])
+        stack = []
+        for i, c in enumerate(chars):
+            if c in OPENERS:
+                stack.append(i)
+            elif stack:
+                j = stack.pop()
+                if CLOSERS[OPENERS.index(chars[j])] != c:
+                    return j, i
+        return None
+
+    def last_zero_before(self, i):
+        # Index of the last bracket before i that brought the depth back to 0, or None
+        if np is not None:
+            zeros = np.flatnonzero(self.depth[:i] == 0)
+            return int(zeros[-1]) if len(zeros) else None
+        return next((j for j in range(i - 1, -1, -1) if self.depth[j] == 0), None)
+
+
+def masked_brackets(data):
+    # (offsets, deltas) of brackets in raw bytes, ignoring the lexer's coarse spans
+    spans = coarse_spans(data)
+    if np is not None:
+        arr = np.frombuffer(data, dtype=np.uint8)
+        lut = np.zeros(256, dtype=np.int8)
+        lut[list(OPENERS)] = 1
+        lut[list(CLOSERS)] = -1
+        deltas = lut[arr]
+        if spans:
+            marks = np.zeros(len(arr) + 1, dtype=np.int32)
+            starts, ends = zip(*spans)
+            # spans never overlap, so starts (and ends) are unique
+            marks[list(starts)] += 1
+            marks[list(ends)] -= 1
+            deltas[np.cumsum(marks[:-1]) > 0] = 0
+        offsets = np.flatnonzero(deltas)
+        return offsets, arr[offsets], deltas[offsets].astype(np.int32)
+    buf = bytearray(data)
+    for a, b in spans:
+        buf[a:b] = bytes(b - a)
+    offsets = [m.start() for m in BRACKET_RE.finditer(buf)]
+    chars = [buf[i] for i in offsets]
+    return offsets, chars, [1 if c in OPENERS else -1 for c in chars]
+
+
+def bracket_profiles(data):
+    # {'all': profile over every bracket kind, '(' / '{' / '[': one kind each}
+    offsets, chars, deltas = masked_brackets(data)
+    if np is not None:
+        profiles = {'all': DepthProfile(offsets, np.cumsum(deltas), chars)}
+        for kind in KINDS:
+            sel = (chars == ord(kind)) | (chars == CLOSERS[OPENERS.index(kind.encode())])
+            profiles[kind] = DepthProfile(offsets[sel], np.cumsum(deltas[sel]))
+        return profiles
+    profiles = {'all': DepthProfile(offsets, list(accumulate(deltas)), chars)}
+    for kind in KINDS:
+        pair = (ord(kind), CLOSERS[OPENERS.index(kind.encode())])
+        sel = [i for i, c in enumerate(chars) if c in pair]
+        profiles[kind] = DepthProfile([offsets[i] for i in sel], list(accumulate(deltas[i] for i in sel)))
+    return profiles
+
+
+def triage(data, first_line=1):
+    # Millisecond prefilter: say whether the brackets are balanced and, if not, where to look.
+    # Per-kind profiles find stray and unclosed brackets; brackets crossing kinds like
+    # "( [ ) ]" are caught by pairing them up level by level over the combined profile.
+    # Strings and comments are masked by lexer.coarse_spans(), which does not know JSX
+    # text: "It's" or "http://" there hides what follows, so clean is not a proof.
+    profiles = bracket_profiles(data)
+
+    def line_at(offset):
+        return data.count(b'\n', 0, offset) + first_line
+
+    def char_at(offset):
+        return chr(data[offset])
+
+    negatives = []
+    for kind in KINDS:
+        p = profiles[kind]
+        i = p.first_negative()
+        if i is not None:
+            # the stray closer sits between the last return to depth 0 (inclusive) and here
+            j = p.last_zero_before(i)
+            negatives.append((int(p.offsets[i]), int(p.offsets[j]) if j is not None else 0))
+    unclosed = []
+    for kind in KINDS:
+        p = profiles[kind]
+        if p.final > 0:
+            unclosed.extend(int(p.offsets[i]) for i in p.never_closed())
+    unclosed.sort()
+    if not negatives and not unclosed:
+        everything = profiles['all']
+        pair = everything.first_crossed()
+        if pair is None:
+            return Triage(True, None, [], None, None)
+        opener, closer = (int(everything.offsets[i]) for i in pair)
+        return Triage(False, None, [], (line_at(opener), line_at(closer)), (line_at(closer), char_at(closer)))
+
+    if negatives:
+        bad, zero = min(negatives)
+        suspect = (line_at(zero), line_at(bad))
+        first_negative = (line_at(bad), char_at(bad))
+    else:
+        suspect = (line_at(unclosed[0]), line_at(len(data)))
+        first_negative = None
+    return Triage(False, first_negative, [(line_at(o), char_at(o)) for o in unclosed], suspect, None)
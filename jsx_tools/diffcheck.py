@@ -0,0 +1,307 @@
+import os
+import re
+from bisect import bisect_right
+from collections import Counter, namedtuple
+from itertools import chain
+
+from jsx_tools.checkpoints import line_offset, refresh, snapshot
+from jsx_tools.checks import make_checkers
+from jsx_tools.git import decode, diff_hunks, show, toplevel
+from jsx_tools.lexer import OPEN, Lexer
+from jsx_tools.locate import ENDERS, OPENERS, indent_agrees, is_region
+from jsx_tools.profile import current as profile
+from jsx_tools.project import SOURCE_EXTS
+from jsx_tools.watch import label
+
+# Checking only what a diff touched (pre-commit). Each hunk is mapped onto the file's
+# lexer checkpoints and only the construct around it is lexed and checked: the innermost
+# function body, or brackets right around JSX ('return (<div>...)', '{open && (<Modal>...)}'),
+# that holds the whole hunk. The region is bounded by brackets rather than by the element
+# itself: a dropped '<div>' pairs every tag after it with the next '</div>' up, which
+# balances inside each element but not inside the brackets around them.
+# Each region's extent is mapped back to the old side through the hunks, and the old
+# text over that same extent is checked too: only what the diff brought in is reported,
+# problems that were already there are counted.
+
+# start..end: offsets, from its opener through its closer (or the end of the text);
+# what: 'function', '<div>', ... or 'file'; diagnostics: of its own tokens only
+Region = namedtuple('Region', 'start end start_line end_line what diagnostics')
+# diagnostic: one the diff brought into region, the new side's region around hunk
+Finding = namedtuple('Finding', 'path hunk region diagnostic')
+# findings: [Finding] in file and line order; existing: problems in the checked regions
+# that the old side had too
+DiffReport = namedtuple('DiffReport', 'findings files hunks regions existing')
+
+JSX_NAME_RE = re.compile(r'<([A-Za-z_$][\w$.:-]*)?')
+
+
+class Window:
+    # Tokens of text from one checkpoint on, lexed `every` lines at a time as asked for
+
+    def __init__(self, text, checkpoint, every, engine='fast'):
+        self.text = text
+        self.every = every
+        self.lexer = Lexer(text, engine)
+        self.lexer.restore(checkpoint.lexer)
+        self.tokens = []  # lexer order, as the checkers take them
+        self.items = []   # brackets and tags, in start order
+        self.done = False
+
+    def more(self):
+        # Lex the next step; False once the text is used up
+        if self.done:
+            return False
+        lexer = self.lexer
+        text = self.text
+        lexer.run(line_offset(text, lexer.line + self.every, lexer.pos, lexer.line))
+        # never stop inside a tag: its token only comes out at the '>'
+        while lexer.pos < len(text) and any(f[0] == 'tag' for f in lexer.frames):
+            lexer.run(line_offset(text, lexer.line + 1, lexer.pos, lexer.line))
+        if lexer.pos >= len(text):
+            lexer.run()
+            lexer.finish()
+            self.done = True
+        new = lexer.tokens
+        lexer.tokens = []
+        self.tokens.extend(new)
+        self.items.extend(sorted((t for t in new if t.kind in OPENERS or t.kind in ENDERS),
+                                 key=lambda t: t.start))
+        return True
+
+    def walk(self):
+        i = 0
+        while True:
+            while i == len(self.items):
+                if not self.more():
+                    return
+            yield self.items[i]
+            i += 1
+
+    def finish(self):
+        while self.more():
+            pass
+
+
+def is_container(text, tok):
+    # A bracket that bounds a region: a function body, or the brackets around JSX
+    if tok.kind != OPEN or tok.value == '[':
+        return False
+    return is_region(text, tok) or text[tok.end:tok.end + 200].lstrip().startswith('<')
+
+
+def describe(text, tok):
+    if is_region(text, tok):
+        return 'function'
+    m = JSX_NAME_RE.match(text[tok.end:tok.end + 200].lstrip())
+    return f"<{m.group(1) or ''}>"
+
+
+def find_region(text, window, start, end):
+    # (opener, closer or None) of the innermost container around start..end, or None
+    # when it opened before the window. Closers pop whatever is open, as in structure().
+    stack = []
+    items = window.walk()
+    pending = []
+    for tok in items:
+        if tok.start >= start:
+            pending.append(tok)
+            break
+        if tok.kind in OPENERS:
+            stack.append(tok)
+        elif stack:
+            stack.pop()
+    candidates = [k for k, tok in enumerate(stack) if is_container(text, tok)]
+    if not candidates:
+        return None
+    for tok in chain(pending, items):
+        if tok.kind in OPENERS:
+            stack.append(tok)
+        elif stack:
+            k = len(stack) - 1
+            opener = stack.pop()
+            if k == candidates[-1]:
+                # a closer indented unlike its opener most likely belongs further out (a
+                # dropped '}' re-pairs every closer after it), so the region is too
+                if tok.end >= end and (tok.line == opener.line or indent_agrees(text, opener, tok)):
+                    return opener, tok
+                candidates.pop()  # closed inside the hunk, or not its own closer
+                if not candidates:
+                    return None
+    return stack[candidates[-1]], None
+
+
+def region_at(text, index, start, end, checks=('brackets', 'tags'), ignore_tags=()):
+    # Region around start..end, lexed from the nearest checkpoint before it; a region
+    # that opened further up is searched for from checkpoints 1, 2, 4, ... blocks back
+    starts = [cp.pos for cp in index.checkpoints]
+    k = bisect_right(starts, start) - 1
+    step = 1
+    while True:
+        window = Window(text, index.checkpoints[k], index.every, index.engine)
+        found = find_region(text, window, start, end)
+        if found is not None or k == 0:
+            break
+        k = max(k - step, 0)
+        step *= 2
+    if found is None:
+        window.finish()
+        first, last, what = 0, len(text), 'file'
+        start_line, end_line = 1, text.count('\n') + 1
+    else:
+        opener, closer = found
+        if closer is None:
+            window.finish()
+        first, last = opener.start, closer.end if closer else len(text)
+        start_line, end_line = opener.line, closer.line if closer else text.count('\n') + 1
+        what = describe(text, opener)
+    diagnostics = window_diagnostics(window, first, last, checks, ignore_tags)
+    return Region(first, last, start_line, end_line, what, diagnostics)
+
+
+def window_diagnostics(window, first, last, checks, ignore_tags):
+    # Diagnostics of the window's tokens that start in first..last, lexing up to last
+    while window.lexer.pos < last and window.more():
+        pass
+    checkers = make_checkers(checks, ignore_tags)
+    for tok in window.tokens:
+        if first <= tok.start < last:
+            for checker in checkers:
+                checker.feed(tok)
+    return [d for c in checkers for d in c.finish()]
+
+
+def old_line(hunks, line, end=False):
+    # Line of the old side that new-side line corresponds to, and whether the line is
+    # unchanged there. A line inside a hunk maps to the start (or with end, the last line)
+    # of what the hunk replaced.
+    delta = 0
+    for h in hunks:
+        if h.new_count and h.new_start <= line < h.new_start + h.new_count:
+            if end:
+                return max(h.old_start + h.old_count - 1, h.old_start), False
+            return h.old_start + (0 if h.old_count else 1), False
+        if (h.new_start + h.new_count if h.new_count else h.new_start + 1) <= line:
+            delta += h.old_count - h.new_count
+    return line + delta, True
+
+
+def old_extent(new_text, old_text, old_index, hunks, region):
+    # Offsets on the old side of the text region covers on the new side: an unchanged
+    # opener or closer line keeps its column, a changed one widens to whole lines
+    def offset(text, index, line, column):
+        line = max(line, 1)
+        cp = index.nearest(line)
+        return min(line_offset(text, line, cp.pos, cp.line) + column, len(text))
+
+    def column(offset):
+        return offset - (new_text.rfind('\n', 0, offset) + 1)
+
+    line, same = old_line(hunks, region.start_line)
+    first = offset(old_text, old_index, line, column(region.start) if same else 0)
+    if region.end >= len(new_text):
+        return first, len(old_text)
+    line, same = old_line(hunks, region.end_line, end=True)
+    if same:
+        return first, offset(old_text, old_index, line, column(region.end))
+    return first, offset(old_text, old_index, line + 1, 0)
+
+
+def hunk_span(text, index, start, count):
+    # Offsets of lines start..start+count-1; for count 0 (nothing on this side), the
+    # point after line start
+    first = start if count else start + 1
+    cp = index.nearest(first)
+    a = line_offset(text, first, cp.pos, cp.line)
+    if not count:
+        return a, a
+    b = line_offset(text, first + count, a, first)
+    return a, max(b - 1, a)
+
+
+def outermost(regions):
+    # Regions not inside another one, so no diagnostic is counted twice
+    return [r for r in regions
+            if not any(o is not r and o.start <= r.start and r.end <= o.end for o in regions)]
+
+
+def file_regions(text, index, spans, checks, ignore_tags):
+    # Region around each (start, count) line span; spans in the same construct share it
+    found = []
+    by_offsets = {}
+    for span in spans:
+        a, b = hunk_span(text, index, *span)
+        region = region_at(text, index, a, b, checks, ignore_tags)
+        found.append(by_offsets.setdefault((region.start, region.end), region))
+    return found, outermost(list(by_offsets.values()))
+
+
+def check_diff(repo='.', base='HEAD', head=None, paths=(), cached=False,
+               checks=('brackets', 'tags'), ignore_tags=(), engine='fast'):
+    # DiffReport for `git diff base [head]` (the index with cached, else the working tree
+    # when head is None), over the .ts/.tsx files it touches
+    prof = profile()
+    with prof.phase('git'):
+        top = toplevel(repo)
+        hunks = [h for h in diff_hunks(repo, base, head, paths, cached) if h.path.endswith(SOURCE_EXTS)]
+    by_path = {}
+    for h in hunks:
+        by_path.setdefault(h.path, []).append(h)
+    findings = []
+    existing = 0
+    checked = 0
+    for path, file_hunks in by_path.items():
+        with prof.phase('git'):
+            if head:
+                new_text = show(repo, head, path)
+            elif cached:
+                new_text = show(repo, '', path)
+            else:
+                with open(os.path.join(top, path), 'rb') as f:
+                    new_text = decode(f.read())
+            old_text = show(repo, base, path)
+        with prof.phase('index'):
+            # the working file keeps its persisted index; blobs are indexed by content
+            if head or cached:
+                new_index = snapshot(new_text, engine)
+            else:
+                new_index = refresh(os.path.join(top, path), new_text, engine)
+            old_index = snapshot(old_text, engine) if old_text is not None else None
+        with prof.phase('match'):
+            new, regions = file_regions(new_text, new_index, [(h.new_start, h.new_count) for h in file_hunks],
+                                        checks, ignore_tags)
+            # what each region's extent held before the diff
+            baselines = []
+            for region in regions:
+                before = Counter()
+                if old_index is not None:
+                    first, last = old_extent(new_text, old_text, old_index, file_hunks, region)
+                    k = bisect_right([cp.pos for cp in old_index.checkpoints], first) - 1
+                    window = Window(old_text, old_index.checkpoints[k], old_index.every, old_index.engine)
+                    before.update(label(d) for d in window_diagnostics(window, first, last, checks, ignore_tags))
+                baselines.append(before)
+        checked += len(regions)
+        for region, before in zip(regions, baselines):
+            # reported against the first hunk inside it
+            hunk = next(h for h, r in zip(file_hunks, new) if region.start <= r.start and r.end <= region.end)
+            for d in sorted(region.diagnostics):
+                if before[label(d)]:
+                    before[label(d)] -= 1
+                    existing += 1
+                else:
+                    findings.append(Finding(path, hunk, region, d))
+    prof.count('hunks', len(hunks))
+    prof.count('regions', checked)
+    findings.sort(key=lambda f: (f.path, f.diagnostic.line))
+    return DiffReport(findings, len(by_path), len(hunks), checked, existing)
+
+
+def print_report(report, out=print):
+    # "path:line: message  [hunk header, region]" for each problem the diff brought in
+    for f in report.findings:
+        r = f.region
+        out(f"{f.path}:{f.diagnostic.line}: {f.diagnostic.message}  "
+            f"[{f.hunk.header} in {r.what}, lines {r.start_line}-{r.end_line}]")
+    already = f", {report.existing} already there" if report.existing else ''
+    out(f"{report.hunks} hunks in {report.files} files, {report.regions} regions checked: "
+        f"{len(report.findings)} new problems{already}.")
+    return len(report.findings)
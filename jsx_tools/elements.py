@@ -0,0 +1,253 @@
+import re
+from bisect import bisect_right
+from collections import namedtuple
+
+from jsx_tools.cache import file_hash, load_json, save_json
+from jsx_tools.lexer import TAG_OPEN, TAG_SELF, TAG_CLOSE, FRAG_OPEN, FRAG_CLOSE
+from jsx_tools.splice import SpliceBuffer
+from jsx_tools.tokens import CODES, token_store
+
+VERSION = 3
+
+# start..end: whole element, '<' through the closing tag's '>' (end == open_end when
+# self-closing or never closed); open_end: end of the opening tag; close_start: start of
+# the closing tag. parent: index of the enclosing element or -1.
+# attrs: {name: raw value} ('"x"' / '{expr}', None for bare attributes)
+# text: the element's own JSX text, whitespace collapsed, without child elements or {...}
+JSXElement = namedtuple('JSXElement', 'index tag start open_end close_start end parent attrs text')
+
+ATTR_NAME_RE = re.compile(r'[A-Za-z_$][\w$:.-]*')
+
+
+def skip_braces(text, pos):
+    # pos is at '{'; returns the offset after its matching '}' (quotes respected)
+    depth = 0
+    quote = None
+    i = pos
+    while i < len(text):
+        c = text[i]
+        if quote:
+            if c == '\\':
+                i += 1
+            elif c == quote:
+                quote = None
+        elif c in '"\'`':
+            quote = c
+        elif c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return len(text)
+
+
+def parse_attrs(head):
+    # Attributes of an opening tag's source ('<div className="x" onClick={...}>')
+    attrs = {}
+    m = ATTR_NAME_RE.match(head, 1)
+    i = m.end() if m else 1
+    while i < len(head):
+        c = head[i]
+        if c == '{':
+            i = skip_braces(head, i)  # {...spread}
+            continue
+        m = ATTR_NAME_RE.match(head, i)
+        if not m:
+            i += 1
+            continue
+        name = m.group()
+        i = m.end()
+        while i < len(head) and head[i].isspace():
+            i += 1
+        if i >= len(head) or head[i] != '=':
+            attrs[name] = None
+            continue
+        i += 1
+        while i < len(head) and head[i].isspace():
+            i += 1
+        if i < len(head) and head[i] in '"\'':
+            end = head.find(head[i], i + 1)
+            end = len(head) if end == -1 else end + 1
+        elif i < len(head) and head[i] == '{':
+            end = skip_braces(head, i)
+        else:
+            end = i
+        attrs[name] = head[i:end]
+        i = end
+    return attrs
+
+
+def own_text(text, start, end, children):
+    # Text between start and end outside the child element spans and {expressions}
+    parts = []
+    pos = start
+    for a, b in children + [(end, end)]:
+        segment = text[pos:a]
+        i = segment.find('{')
+        while i != -1:
+            j = skip_braces(segment, i)
+            segment = segment[:i] + ' ' + segment[j:]
+            i = segment.find('{', i + 1)
+        parts.append(segment)
+        pos = max(pos, b)
+    return ' '.join(' '.join(parts).split())
+
+
+OPEN_CODES = frozenset(CODES[k] for k in (TAG_OPEN, FRAG_OPEN, TAG_SELF))
+CLOSE_CODES = frozenset(CODES[k] for k in (TAG_CLOSE, FRAG_CLOSE))
+SELF_CODE = CODES[TAG_SELF]
+
+
+def build_rows(store):
+    # [start, open_end, close_start, end, tag, parent] per element of a TokenStore in start
+    # order; a closer unwinds to its nearest matching opener and stray closers are ignored.
+    # Reads the columns directly, no per-token objects.
+    rows = []
+    stack = []
+    names = store.names
+    starts = store.start
+    ends = store.end
+    values = store.value
+    for i, code in enumerate(store.kind):
+        if code in OPEN_CODES:
+            parent = stack[-1] if stack else -1
+            if code != SELF_CODE:
+                stack.append(len(rows))
+            end = ends[i]
+            rows.append([starts[i], end, end, end, names[values[i]], parent])
+        elif code in CLOSE_CODES:
+            name = names[values[i]]
+            for depth in range(len(stack) - 1, -1, -1):
+                if rows[stack[depth]][4] == name:
+                    rows[stack[depth]][2:4] = [starts[i], ends[i]]
+                    del stack[depth:]
+                    break
+    return rows
+
+
+class ElementIndex:
+    # Every JSX element of one file version. Lookups by offset go through a bisect on the
+    # start offsets and then up the parent chain; children lists make siblings O(1).
+
+    def __init__(self, elements):
+        self.elements = elements
+        self.starts = [e.start for e in elements]
+        self.children = [[] for _ in elements]
+        for e in elements:
+            if e.parent != -1:
+                self.children[e.parent].append(e.index)
+        self.roots = [e.index for e in elements if e.parent == -1]
+        # position of each element among its siblings
+        self.position = [0] * len(elements)
+        for ids in self.children + [self.roots]:
+            for k, i in enumerate(ids):
+                self.position[i] = k
+
+    @classmethod
+    def build(cls, text, store=None):
+        # store: the text's TokenStore in start order (token_store(text) if not given)
+        rows = build_rows(token_store(text) if store is None else store)
+        kids = [[] for _ in rows]
+        for i, row in enumerate(rows):
+            if row[5] != -1:
+                kids[row[5]].append((row[0], row[3]))
+        elements = [
+            JSXElement(i, tag, start, open_end, close_start, end, parent,
+                       parse_attrs(text[start:open_end]),
+                       own_text(text, open_end, close_start, kids[i]) if close_start > open_end else '')
+            for i, (start, open_end, close_start, end, tag, parent) in enumerate(rows)
+        ]
+        return cls(elements)
+
+    def __len__(self):
+        return len(self.elements)
+
+    def __getitem__(self, i):
+        return self.elements[i]
+
+    def ancestors(self, i):
+        # i's parent, grandparent, ... up to a root
+        i = self.elements[i].parent
+        while i != -1:
+            yield self.elements[i]
+            i = self.elements[i].parent
+
+    def at(self, offset):
+        # Innermost element containing offset, or None. The last element starting at or
+        # before offset is either that element or nested inside it.
+        i = bisect_right(self.starts, offset) - 1
+        while i != -1:
+            e = self.elements[i]
+            if offset < e.end:
+                return e
+            i = e.parent
+        return None
+
+    def enclosing(self, start, end, tag=None, attrs=()):
+        # Innermost element around start..end with this tag and attributes (see matches)
+        e = self.at(start)
+        while e is not None and not (end <= e.end and self.matches(e, tag, attrs)):
+            e = self.elements[e.parent] if e.parent != -1 else None
+        return e
+
+    def containing(self, text, literal, tag=None, attrs=()):
+        # enclosing() for every occurrence of literal in text, without duplicates
+        found = {}
+        pos = text.find(literal)
+        while pos != -1:
+            e = self.enclosing(pos, pos + len(literal), tag, attrs)
+            if e is not None:
+                found[e.index] = e
+            pos = text.find(literal, pos + 1)
+        return [found[i] for i in sorted(found)]
+
+    def siblings(self, i):
+        # Elements sharing i's parent, in source order (i itself included)
+        parent = self.elements[i].parent
+        ids = self.children[parent] if parent != -1 else self.roots
+        return [self.elements[j] for j in ids]
+
+    def next_sibling(self, i):
+        parent = self.elements[i].parent
+        ids = self.children[parent] if parent != -1 else self.roots
+        k = self.position[i] + 1
+        return self.elements[ids[k]] if k < len(ids) else None
+
+    def find(self, tag=None, attrs=(), text=None):
+        # Elements by tag, attributes and own text (substring)
+        return [e for e in self.elements
+                if self.matches(e, tag, attrs) and (text is None or text in e.text)]
+
+    @staticmethod
+    def matches(e, tag=None, attrs=()):
+        # attrs: {name: substring of its value, or None for presence}, or substrings of the
+        # attribute source as a whole
+        if tag is not None and e.tag != tag:
+            return False
+        if isinstance(attrs, dict):
+            return all(name in e.attrs and (want is None or want in (e.attrs[name] or ''))
+                       for name, want in attrs.items())
+        source = ' '.join(f"{k}={v}" if v is not None else k for k, v in e.attrs.items())
+        return all(want in source for want in attrs)
+
+    def to_json(self):
+        return {'version': VERSION, 'elements': [list(e) for e in self.elements]}
+
+    @classmethod
+    def from_json(cls, data):
+        return cls([JSXElement(*e) for e in data['elements']])
+
+
+def element_index(path):
+    # (text, index) for a file; offsets are into SpliceBuffer.text() (universal newlines,
+    # no BOM), as Patch sees it. The index is cached on disk by file hash.
+    text = SpliceBuffer.load(path).text()
+    digest = file_hash(path)
+    data = load_json('elements', digest)
+    if data and data.get('version') == VERSION:
+        return text, ElementIndex.from_json(data)
+    index = ElementIndex.build(text)
+    save_json('elements', digest, index.to_json())
+    return text, index
@@ -0,0 +1,130 @@
+import re
+import subprocess
+from collections import namedtuple
+
+# Thin wrapper over the local git binary: diff hunks and file contents at a revision.
+# Paths are relative to the repository's top level, as git prints them.
+
+# old_start/old_count: lines replaced in the old side (count 0: inserted after old_start),
+# new_start/new_count: the same for the new side; header: the '@@ ... @@' line
+Hunk = namedtuple('Hunk', 'path old_start old_count new_start new_count header')
+# a commit that changed a file: blob is the file's content after it, path its name there,
+# date the commit time (seconds since the epoch)
+Revision = namedtuple('Revision', 'commit blob path date subject')
+
+HUNK_RE = re.compile(r'@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+
+
+class GitError(Exception):
+    # git exited non-zero; the message is its stderr
+    pass
+
+
+def run_git(repo, *args):
+    # stdout of `git -C repo args...` as bytes
+    proc = subprocess.run(['git', '-C', repo, *args], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        raise GitError(proc.stderr.decode('utf-8', 'replace').strip() or f"git {args[0]} failed")
+    return proc.stdout
+
+
+def toplevel(repo):
+    return run_git(repo, 'rev-parse', '--show-toplevel').decode('utf-8').strip()
+
+
+def decode(raw):
+    # Same text open(path, 'r') would give (universal newlines)
+    return raw.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+
+
+def diff_hunks(repo, base='HEAD', head=None, paths=(), cached=False):
+    # Hunks of `git diff` without context lines: working tree against base (head None),
+    # the index against base (cached), or base against head. Deleted files are left out,
+    # since there is nothing left to check in them.
+    args = ['diff', '-U0', '--no-color', '--no-ext-diff', '--no-renames', '--diff-filter=d']
+    if cached:
+        args.append('--cached')
+    args.extend(rev for rev in (base, head) if rev)
+    # quotePath off: non-ASCII names come through as they are, not as octal escapes
+    out = run_git(repo, '-c', 'core.quotePath=false', *args, '--', *paths).decode('utf-8', 'replace')
+    hunks = []
+    path = None
+    for line in out.split('\n'):
+        if line.startswith('+++ '):
+            name = line[4:]
+            path = name[2:] if name.startswith('b/') else None
+        elif line.startswith('@@') and path is not None:
+            m = HUNK_RE.match(line)
+            if m:
+                old_start, old_count, new_start, new_count = m.groups()
+                hunks.append(Hunk(path, int(old_start), 1 if old_count is None else int(old_count),
+                                  int(new_start), 1 if new_count is None else int(new_count),
+                                  m.group()))
+    return hunks
+
+
+def show(repo, rev, path):
+    # Text of path at rev ('' for the index), or None where it does not exist
+    try:
+        return decode(run_git(repo, 'cat-file', 'blob', f"{rev}:{path}"))
+    except GitError:
+        return None
+
+
+def history(repo, path, rev='HEAD', follow=True):
+    # Revisions of rev's history that changed path, oldest first (through renames when
+    # follow). Merges and deletions are left out: they add no content of their own.
+    args = ['log', '--format=%x01%H%x09%ct%x09%s', '--raw', '--no-abbrev']
+    if follow:
+        args.append('--follow')
+    out = run_git(repo, '-c', 'core.quotePath=false', *args, rev, '--', path).decode('utf-8', 'replace')
+    revisions = []
+    for record in out.split('\x01')[1:]:
+        lines = record.split('\n')
+        commit, date, subject = lines[0].split('\t', 2)
+        for line in lines[1:]:
+            if not line.startswith(':'):
+                continue
+            # ':100644 100644 <old blob> <new blob> M\tpath' (R100 with two paths)
+            fields = line.split('\t')
+            blob = fields[0].split()[3]
+            if blob.strip('0'):
+                revisions.append(Revision(commit, blob, fields[-1], int(date), subject))
+            break
+    revisions.reverse()
+    return revisions
+
+
+class CatFile:
+    # One long-lived `git cat-file --batch`: object names go to its stdin and contents come
+    # back on its stdout, instead of one git process per object
+
+    def __init__(self, repo):
+        self.proc = subprocess.Popen(['git', '-C', repo, 'cat-file', '--batch'],
+                                     stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self.reads = 0
+
+    def read(self, name):
+        # (sha, bytes) for an object name ('<sha>', 'HEAD~3:src/App.tsx'), None if missing
+        self.proc.stdin.write(name.encode('utf-8') + b'\n')
+        self.proc.stdin.flush()
+        header = self.proc.stdout.readline().split()
+        if len(header) != 3:
+            return None  # '<name> missing' / '<name> ambiguous'
+        sha, _, size = header
+        data = self.proc.stdout.read(int(size))
+        self.proc.stdout.read(1)  # the '\n' after the contents
+        self.reads += 1
+        return sha.decode('ascii'), data
+
+    def close(self):
+        if self.proc.poll() is None:
+            self.proc.stdin.close()
+            self.proc.wait()
+        self.proc.stdout.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
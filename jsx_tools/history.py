@@ -0,0 +1,109 @@
+import time
+from collections import namedtuple
+
+from jsx_tools.cache import content_hash, load_json, save_json
+from jsx_tools.checks import Diagnostic, check_text
+from jsx_tools.git import CatFile, decode, history, run_git
+from jsx_tools.profile import current as profile
+from jsx_tools.results import RESULTS_VERSION
+
+# Bisecting a file's git history for the change that broke its balance. Blobs are read
+# through one long-lived `git cat-file --batch` and their diagnostics are cached by blob
+# SHA, which names the content for good, so a rerun (or a revert back to a known blob)
+# costs no lexing at all.
+
+# revisions: the file's history, oldest first (git.Revision); first_bad / last_good:
+# Revisions or None (not broken at the tip / broken from the first revision searched);
+# diagnostics: first_bad's; checked: blobs looked at, lexed: of those, the cache misses
+BisectResult = namedtuple('BisectResult', 'revisions first_bad last_good diagnostics checked lexed')
+
+
+class BlobChecker:
+    # Diagnostics per blob SHA: from the cache, else read through cat and checked
+
+    def __init__(self, cat, checks=('brackets', 'tags'), ignore_tags=(), engine='fast'):
+        self.cat = cat
+        self.checks = tuple(checks)
+        self.ignore_tags = tuple(sorted(ignore_tags))
+        self.engine = engine
+        self.seen = {}
+        self.lexed = 0
+
+    def key(self, blob):
+        return content_hash(repr((RESULTS_VERSION, blob, self.checks, self.ignore_tags, self.engine)))
+
+    def __call__(self, blob):
+        if blob in self.seen:
+            return self.seen[blob]
+        prof = profile()
+        data = load_json('blobs', self.key(blob))
+        if data is not None:
+            prof.count('blob_cache_hits')
+            diagnostics = [Diagnostic(*d) for d in data]
+        else:
+            with prof.phase('read'):
+                _, raw = self.cat.read(blob)
+            with prof.phase('lex'):
+                diagnostics = check_text(decode(raw), checks=self.checks, ignore_tags=self.ignore_tags,
+                                         engine=self.engine)
+            save_json('blobs', self.key(blob), [list(d) for d in diagnostics])
+            self.lexed += 1
+        self.seen[blob] = diagnostics
+        return diagnostics
+
+
+def bisect_history(repo, path, rev='HEAD', good=None, checks=('brackets', 'tags'), ignore_tags=(),
+                   engine='fast'):
+    # First revision of path (in rev's history) with diagnostics after one without, by
+    # binary search between good (default: the oldest revision) and rev; None if path has
+    # no history
+    with profile().phase('git'):
+        revisions = history(repo, path, rev)
+        # good's ancestry rather than the file's history at good, which may predate a rename
+        known = set(run_git(repo, 'rev-list', good).decode('ascii').split()) if good else set()
+    if not revisions:
+        return None
+    lo = max((i for i, r in enumerate(revisions) if r.commit in known), default=0)
+    hi = len(revisions) - 1
+    with CatFile(repo) as cat:
+        check = BlobChecker(cat, checks, ignore_tags, engine)
+        if not check(revisions[hi].blob):
+            return BisectResult(revisions, None, revisions[hi], [], len(check.seen), check.lexed)
+        if check(revisions[lo].blob):
+            # bad from the start of the range: nothing good to align against
+            return BisectResult(revisions, revisions[lo], None, check(revisions[lo].blob),
+                                len(check.seen), check.lexed)
+        # invariant: lo good, hi bad
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if check(revisions[mid].blob):
+                hi = mid
+            else:
+                lo = mid
+        return BisectResult(revisions, revisions[hi], revisions[lo], check(revisions[hi].blob),
+                            len(check.seen), check.lexed)
+
+
+def describe(rev):
+    day = time.strftime('%Y-%m-%d', time.localtime(rev.date))
+    return f"{rev.commit[:10]} {day} {rev.subject!r} (blob {rev.blob[:10]})"
+
+
+def print_bisect(path, result, limit=10):
+    if result is None:
+        print(f"{path}: no history.")
+        return
+    print(f"{path}: {len(result.revisions)} revisions, {result.checked} checked "
+          f"({result.checked - result.lexed} from cache)")
+    if result.first_bad is None:
+        print(f"not broken at {describe(result.last_good)}")
+        return
+    print(f"first bad: {describe(result.first_bad)}")
+    for d in result.diagnostics[:limit]:
+        print(f"  {result.first_bad.path}:{d.line}: {d.message}")
+    if len(result.diagnostics) > limit:
+        print(f"  ... {len(result.diagnostics) - limit} more")
+    if result.last_good is None:
+        print("last good: none, broken since the first revision searched")
+    else:
+        print(f"last good: {describe(result.last_good)}")
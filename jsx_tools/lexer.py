@@ -0,0 +1,453 @@
+import re
+from collections import namedtuple
+
+# Token kinds
+OPEN = 'open'              # ( { [
+CLOSE = 'close'            # ) } ]
+TAG_OPEN = 'tag_open'      # <div ...>
+TAG_SELF = 'tag_self'      # <img ... />
+TAG_CLOSE = 'tag_close'    # </div>
+FRAG_OPEN = 'frag_open'    # <>
+FRAG_CLOSE = 'frag_close'  # </>
+STRING = 'string'
+TEMPLATE = 'template'      # one text chunk of a template literal (split at ${ ... })
+COMMENT = 'comment'
+REGEX = 'regex'
+
+# value: bracket char or tag name ('' for everything else)
+Token = namedtuple('Token', 'kind value line start end')
+
+IDENT_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$')
+SPACE_CHARS = frozenset(' \t\r\n')
+# A '<' or '/' right after one of these continues an expression (comparison, generic, division)
+VALUE_END = IDENT_CHARS | frozenset(')]"\'`')
+# '/' after these is division; '}' and '>' also end JSX expression containers and tags
+NO_REGEX_AFTER = VALUE_END | frozenset('}>')
+# ...unless the identifier is a keyword that starts a new expression
+EXPR_KEYWORDS = frozenset([
+    'return', 'yield', 'await', 'default', 'case', 'else', 'do', 'in', 'of',
+    'typeof', 'void', 'delete', 'new', 'throw',
+])
+
+ENGINES = ('fast', 'reference')
+
+# Fast engine: per mode, the next char that can change state. Everything in between
+# (identifiers, JSX attribute soup, Korean text, comment bodies) is skipped by one search.
+SKIP_PATTERNS = {
+    'code': re.compile(r'[/"\'`()\[\]{}<]'),
+    'tag': re.compile(r'["\'{/>]'),
+    'str"': re.compile(r'["\\\n]'),
+    "str'": re.compile(r"['\\\n]"),
+    'tpl': re.compile(r'[`\\$]'),
+    'block': re.compile(r'\*/'),
+    'regex': re.compile(r'[/\\\[\]\n]'),
+    # JSX children: quotes, '//' and parens are plain text; only tags and {...} matter
+    'jsx': re.compile(r'[<{]'),
+}
+SKIP_PATTERNS['expr'] = SKIP_PATTERNS['tplexpr'] = SKIP_PATTERNS['code']
+# Index of the absolute start offset inside each frame kind that has one
+START_FIELD = {'tag': 2, 'str': 2, 'tpl': 1, 'block': 1, 'regex': 1}
+NAME_RE = re.compile(r'[A-Za-z0-9_$.:-]*')
+FLAGS_RE = re.compile(r'[A-Za-z0-9_$]*')
+# Coarse, context-free approximation of strings/comments/templates over raw bytes,
+# for vectorized prefilters (depth.py) that cannot afford the state machine
+_COARSE_REGEX_BODY = rb'(?![/*])(?:[^/\\\n\[]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/'
+COARSE_RE = re.compile(
+    # every branch starts with / " ' or ` so the engine can skip ahead cheaply;
+    # a regex literal only counts right after an operator-ish char, e.g. .replace(/\//g, ' ')
+    rb'/(?:/[^\n]*|\*.*?\*/'
+    + rb'|(?<=[(,=:\[!&|?{;]/)' + _COARSE_REGEX_BODY
+    + rb'|(?<=[(,=:\[!&|?{;][ \t]/)' + _COARSE_REGEX_BODY
+    + rb')|"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'|`(?:[^`\\]|\\.)*`',
+    re.S)
+
+
+def shift_frames(frames, delta):
+    shifted = []
+    for frame in frames:
+        i = START_FIELD.get(frame[0])
+        shifted.append(frame if i is None else frame[:i] + (frame[i] + delta,) + frame[i + 1:])
+    return shifted
+
+
+class Lexer:
+    # Resumable state machine over the whole file.
+    # frames is a stack of tuples; the top one decides how the next char is read:
+    #   ('code', braces) / ('expr', braces) / ('tplexpr', braces)  plain code; expr is a
+    #       JSX attribute {...}, tplexpr a template ${...}; braces counts nested { }
+    #   ('tag', name, start, line)          inside <Name ...> attributes
+    #   ('jsx', names)                      JSX children text inside the open elements
+    #       `names` ('' for <>); pushed by an opening tag in code, popped when the
+    #       outermost one closes
+    #   ('str', quote, start, line)         '...' or "..."
+    #   ('tpl', start, line)                template literal text
+    #   ('block', start, line)              /* ... */
+    #   ('regex', start, line, in_class)    /.../flags
+    # Positions are relative to self.text; self.base is the offset of self.text in the
+    # file when it is fed in chunks (see feed()), so tokens always carry file offsets.
+
+    def __init__(self, text, engine='fast'):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown lexer engine: {engine}")
+        self.engine = engine
+        self.text = text
+        self.base = 0
+        self.pos = 0
+        self.line = 1
+        self.frames = [('code', 0)]
+        self.tokens = []
+        # lookbehind result carried over from the previous chunk
+        self.carry = ('', '', False)
+
+    def state(self):
+        # Everything needed to resume lexing at self.pos (see checkpoints.py)
+        return self.base + self.pos, self.line, tuple(shift_frames(self.frames, self.base))
+
+    def restore(self, state):
+        pos, line, frames = state
+        self.pos = pos - self.base
+        self.line = line
+        self.frames = shift_frames([tuple(f) for f in frames], -self.base)
+
+    def feed(self, text):
+        # Streaming input: finish the current chunk and continue with the next one.
+        # Chunks must split at line boundaries (after a '\n').
+        self.run()
+        ch, word, _ = self._prev_word(len(self.text))
+        self.carry = (ch, word, bool(ch))
+        size = len(self.text)
+        self.frames = shift_frames(self.frames, -size)
+        self.base += size
+        self.pos -= size
+        self.text = text
+        return self.run()
+
+    def emit(self, kind, value, line, start, end):
+        self.tokens.append(Token(kind, value, line, self.base + start, self.base + end))
+
+    def run(self, end=None):
+        end = len(self.text) if end is None else end
+        if self.engine == 'fast':
+            self._run_fast(end)
+        else:
+            self._run_reference(end)
+        return self.tokens
+
+    def _run_reference(self, end):
+        # Char-by-char loop; kept as the reference the fast engine is compared against
+        text = self.text
+        while self.pos < end:
+            self._dispatch(text[self.pos])
+
+    def _run_fast(self, end):
+        text = self.text
+        frames = self.frames
+        while self.pos < end:
+            frame = frames[-1]
+            mode = frame[0]
+            pattern = SKIP_PATTERNS[mode + frame[1] if mode == 'str' else mode]
+            m = pattern.search(text, self.pos, end)
+            stop = m.start() if m else end
+            if stop > self.pos:
+                # skipped chars are inert in this mode; only their newlines matter
+                self.line += text.count('\n', self.pos, stop)
+                self.pos = stop
+                continue
+            self._dispatch(text[stop])
+
+    def _dispatch(self, ch):
+        if ch == '\n':
+            self._newline()
+            return
+        mode = self.frames[-1][0]
+        if mode in ('code', 'expr', 'tplexpr'):
+            self._code(ch)
+        elif mode == 'tag':
+            self._tag(ch)
+        elif mode == 'jsx':
+            self._jsx(ch)
+        elif mode == 'str':
+            self._str(ch)
+        elif mode == 'tpl':
+            self._tpl(ch)
+        elif mode == 'block':
+            self._block(ch)
+        else:
+            self._regex(ch)
+
+    def finish(self):
+        # Flush constructs left open at EOF so checkers still see them
+        end = len(self.text)
+        while len(self.frames) > 1:
+            frame = self.frames.pop()
+            mode = frame[0]
+            if mode == 'tag':
+                self.emit(TAG_OPEN, frame[1], frame[3], frame[2], end)
+            elif mode == 'str':
+                self.emit(STRING, '', frame[3], frame[2], end)
+            elif mode == 'tpl':
+                self.emit(TEMPLATE, '', frame[2], frame[1], end)
+            elif mode == 'block':
+                self.emit(COMMENT, '', frame[2], frame[1], end)
+            elif mode == 'regex':
+                self.emit(REGEX, '', frame[2], frame[1], end)
+        return self.tokens
+
+    # --- helpers -------------------------------------------------------
+
+    def _newline(self):
+        # Unterminated string/regex: stop at end of line instead of eating the file
+        mode = self.frames[-1][0]
+        if mode == 'str':
+            _, _, start, line = self.frames.pop()
+            self.emit(STRING, '', line, start, self.pos)
+        elif mode == 'regex':
+            _, start, line, _ = self.frames.pop()
+            self.emit(REGEX, '', line, start, self.pos)
+        self.line += 1
+        self.pos += 1
+
+    def _prev_word(self, pos):
+        # Last significant char before pos, plus the identifier ending there (if any)
+        text = self.text
+        i = pos - 1
+        while i >= 0 and text[i] in SPACE_CHARS:
+            i -= 1
+        if i < 0:
+            return self.carry
+        ch = text[i]
+        if ch not in IDENT_CHARS:
+            return ch, '', i < pos - 1
+        j = i
+        while j > 0 and text[j - 1] in IDENT_CHARS:
+            j -= 1
+        return ch, text[j:i + 1], i < pos - 1
+
+    def _regex_allowed(self, pos):
+        ch, word, _ = self._prev_word(pos)
+        # non-ASCII letters only show up in JSX text ("비행기/신분증"), never before a regex
+        if ch in NO_REGEX_AFTER or ch.isalnum():
+            return word in EXPR_KEYWORDS
+        return True
+
+    def _jsx_allowed(self, pos, name_end):
+        ch, word, spaced = self._prev_word(pos)
+        if ch not in VALUE_END or word in EXPR_KEYWORDS:
+            return True
+        # "Hello <b>" in JSX text vs. "a<b" / "i <n;" in code
+        if not spaced:
+            return False
+        return name_end >= len(self.text) or self.text[name_end] in ' \t\r\n>/'
+
+    def _type_params(self, name_end):
+        # '<T,>(x: T) =>' and '<T extends object>(' open the type parameters of a generic
+        # arrow function (a bare '<T>(' is JSX in .tsx); no tag name is followed by either
+        text = self.text
+        pos = self._skip_inline_space(name_end)
+        if text.startswith(',', pos):
+            return True
+        return (pos > name_end and text.startswith('extends', pos)
+                and text[pos + 7:pos + 8] in (' ', '\t', '\r', '\n'))
+
+    def _open_element(self, name):
+        # An opening tag or <> starts (or nests deeper into) JSX children text
+        mode, names = self.frames[-1]
+        if mode == 'jsx':
+            self.frames[-1] = ('jsx', tuple(names) + (name,))
+        else:
+            self.frames.append(('jsx', (name,)))
+
+    def _close_element(self, name):
+        # Closes back to the innermost open element of that name, so a missing closer
+        # deeper in does not leave the code after the element read as text. A closer
+        # with no open element of its name (or one outside JSX) changes nothing.
+        mode, names = self.frames[-1]
+        if mode != 'jsx' or name not in names:
+            return
+        names = tuple(names)
+        i = len(names) - 1 - names[::-1].index(name)
+        if i:
+            self.frames[-1] = ('jsx', names[:i])
+        else:
+            self.frames.pop()
+
+    def _scan_name(self, pos):
+        return NAME_RE.match(self.text, pos).end()
+
+    def _skip_inline_space(self, pos):
+        text = self.text
+        while pos < len(text) and text[pos] in ' \t':
+            pos += 1
+        return pos
+
+    # --- modes ---------------------------------------------------------
+
+    def _code(self, ch):
+        text = self.text
+        pos = self.pos
+        nxt = text[pos + 1] if pos + 1 < len(text) else ''
+        if ch == '/':
+            if nxt == '/':
+                eol = text.find('\n', pos)
+                eol = len(text) if eol == -1 else eol
+                self.emit(COMMENT, '', self.line, pos, eol)
+                self.pos = eol
+                return
+            if nxt == '*':
+                self.frames.append(('block', pos, self.line))
+                self.pos = pos + 2
+                return
+            if self._regex_allowed(pos):
+                self.frames.append(('regex', pos, self.line, False))
+        elif ch in '"\'':
+            self.frames.append(('str', ch, pos, self.line))
+        elif ch == '`':
+            self.frames.append(('tpl', pos, self.line))
+        elif ch in '([':
+            self.emit(OPEN, ch, self.line, pos, pos + 1)
+        elif ch in ')]':
+            self.emit(CLOSE, ch, self.line, pos, pos + 1)
+        elif ch == '{':
+            mode, braces = self.frames[-1]
+            self.frames[-1] = (mode, braces + 1)
+            self.emit(OPEN, ch, self.line, pos, pos + 1)
+        elif ch == '}':
+            mode, braces = self.frames[-1]
+            if braces or mode == 'code':
+                self.frames[-1] = (mode, max(braces - 1, 0))
+                self.emit(CLOSE, ch, self.line, pos, pos + 1)
+            elif mode == 'expr':
+                self.frames.pop()
+                self.emit(CLOSE, ch, self.line, pos, pos + 1)
+            else:
+                # end of ${...}: back to template text, next chunk starts here
+                self.frames.pop()
+                self.frames[-1] = ('tpl', pos, self.line)
+        elif ch == '<':
+            self.pos = self._angle(pos, nxt)
+            return
+        self.pos = pos + 1
+
+    def _angle(self, pos, nxt, in_jsx=False):
+        # In JSX children every '<' that can start a tag does; in code the text before
+        # it decides between a tag and a comparison or generic
+        line = self.line
+        if nxt == '/':
+            name_start = self._skip_inline_space(pos + 2)
+            name_end = self._scan_name(name_start)
+            close = self._skip_inline_space(name_end)
+            has_gt = close < len(self.text) and self.text[close] == '>'
+            name = self.text[name_start:name_end]
+            if not name and not has_gt:
+                return pos + 1
+            end = close + 1 if has_gt else name_end
+            self.emit(TAG_CLOSE if name else FRAG_CLOSE, name, line, pos, end)
+            self._close_element(name)
+            return end
+        if nxt == '>':
+            if not in_jsx and not self._jsx_allowed(pos, pos + 1):
+                return pos + 1
+            self.emit(FRAG_OPEN, '', line, pos, pos + 2)
+            self._open_element('')
+            return pos + 2
+        if nxt in IDENT_CHARS and not nxt.isdigit():
+            name_end = self._scan_name(pos + 1)
+            if in_jsx or (not self._type_params(name_end) and self._jsx_allowed(pos, name_end)):
+                self.frames.append(('tag', self.text[pos + 1:name_end], pos, line))
+                return name_end
+        return pos + 1
+
+    def _tag(self, ch):
+        pos = self.pos
+        if ch in '"\'':
+            self.frames.append(('str', ch, pos, self.line))
+        elif ch == '{':
+            self.emit(OPEN, ch, self.line, pos, pos + 1)
+            self.frames.append(('expr', 0))
+        elif ch == '/' and self.text.startswith('>', pos + 1):
+            _, name, start, line = self.frames.pop()
+            self.emit(TAG_SELF, name, line, start, pos + 2)
+            self.pos = pos + 2
+            return
+        elif ch == '>':
+            _, name, start, line = self.frames.pop()
+            self.emit(TAG_OPEN, name, line, start, pos + 1)
+            self._open_element(name)
+        self.pos = pos + 1
+
+    def _jsx(self, ch):
+        pos = self.pos
+        if ch == '<':
+            nxt = self.text[pos + 1] if pos + 1 < len(self.text) else ''
+            self.pos = self._angle(pos, nxt, in_jsx=True)
+            return
+        if ch == '{':
+            self.emit(OPEN, ch, self.line, pos, pos + 1)
+            self.frames.append(('expr', 0))
+        self.pos = pos + 1
+
+    def _str(self, ch):
+        pos = self.pos
+        if ch == '\\':
+            # an escaped newline is left for _newline to count
+            self.pos = pos + 1 if self.text.startswith('\n', pos + 1) else pos + 2
+            return
+        _, quote, start, line = self.frames[-1]
+        if ch == quote:
+            self.frames.pop()
+            self.emit(STRING, '', line, start, pos + 1)
+        self.pos = pos + 1
+
+    def _tpl(self, ch):
+        pos = self.pos
+        if ch == '\\':
+            self.pos = pos + 1 if self.text.startswith('\n', pos + 1) else pos + 2
+            return
+        _, start, line = self.frames[-1]
+        if ch == '`':
+            self.frames.pop()
+            self.emit(TEMPLATE, '', line, start, pos + 1)
+        elif ch == '$' and self.text.startswith('{', pos + 1):
+            self.emit(TEMPLATE, '', line, start, pos + 2)
+            self.frames.append(('tplexpr', 0))
+            self.pos = pos + 2
+            return
+        self.pos = pos + 1
+
+    def _block(self, ch):
+        pos = self.pos
+        if ch == '*' and self.text.startswith('/', pos + 1):
+            _, start, line = self.frames.pop()
+            self.emit(COMMENT, '', line, start, pos + 2)
+            self.pos = pos + 2
+            return
+        self.pos = pos + 1
+
+    def _regex(self, ch):
+        pos = self.pos
+        _, start, line, in_class = self.frames[-1]
+        if ch == '\\':
+            self.pos = pos + 1 if self.text.startswith('\n', pos + 1) else pos + 2
+            return
+        if ch == '[':
+            self.frames[-1] = ('regex', start, line, True)
+        elif ch == ']':
+            self.frames[-1] = ('regex', start, line, False)
+        elif ch == '/' and not in_class:
+            self.frames.pop()
+            end = FLAGS_RE.match(self.text, pos + 1).end()
+            self.emit(REGEX, '', line, start, end)
+            self.pos = end
+            return
+        self.pos = pos + 1
+
+
+def coarse_spans(data):
+    # (start, end) byte ranges of strings, comments and template literals
+    return [m.span() for m in COARSE_RE.finditer(data)]
+
+
+def tokenize(text, engine='fast'):
+    lexer = Lexer(text, engine)
+    lexer.run()
+    return lexer.finish()
@@ -0,0 +1,116 @@
+import os
+from array import array
+
+from jsx_tools.cache import file_hash, load_bytes, save_bytes
+
+# offsets[n - 1] is the byte offset where line n starts; the last entry is the file size,
+# so line n spans offsets[n - 1]:offsets[n] (newline included).
+
+
+class LineIndex:
+
+    def __init__(self, offsets):
+        self.offsets = offsets
+
+    @classmethod
+    def build(cls, data):
+        offsets = array('Q', [0])
+        find = data.find
+        pos = find(b'\n')
+        while pos != -1:
+            offsets.append(pos + 1)
+            pos = find(b'\n', pos + 1)
+        if offsets[-1] != len(data):
+            offsets.append(len(data))
+        return cls(offsets)
+
+    @property
+    def line_count(self):
+        return len(self.offsets) - 1
+
+    def span(self, start_line, end_line=None):
+        # Byte range of lines start_line..end_line (1-based, inclusive), clamped to the file
+        end_line = start_line if end_line is None else end_line
+        start_line = min(max(start_line, 1), self.line_count + 1)
+        end_line = min(max(end_line, start_line - 1), self.line_count)
+        return self.offsets[start_line - 1], self.offsets[end_line]
+
+    def line_of(self, offset):
+        # 1-based line containing a byte offset
+        lo, hi = 0, len(self.offsets) - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self.offsets[mid] <= offset:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo + 1
+
+    def to_bytes(self):
+        return self.offsets.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        offsets = array('Q')
+        offsets.frombytes(data)
+        return cls(offsets)
+
+
+def line_index(path):
+    # Built once per file version and cached on disk by content hash
+    digest = file_hash(path)
+    data = load_bytes('lines', digest)
+    if data is not None:
+        return LineIndex.from_bytes(data)
+    with open(path, 'rb') as f:
+        index = LineIndex.build(f.read())
+    save_bytes('lines', digest, index.to_bytes())
+    return index
+
+
+def read_range(path, start_line, end_line=None, index=None):
+    # Raw bytes of the requested lines only
+    index = index or line_index(path)
+    a, b = index.span(start_line, end_line)
+    with open(path, 'rb') as f:
+        f.seek(a)
+        return f.read(b - a)
+
+
+def read_lines(path, start_line, end_line=None, index=None):
+    # Split on '\n' only, like readlines() on the file
+    parts = read_range(path, start_line, end_line, index).decode('utf-8').split('\n')
+    lines = [part + '\n' for part in parts[:-1]]
+    if parts[-1]:
+        lines.append(parts[-1])
+    return lines
+
+
+def splice_lines(path, replacements, index=None):
+    # replacements: {(start_line, end_line) or line: bytes}; ranges must not overlap.
+    # Unchanged bytes are copied through as-is, so line endings outside the edits survive.
+    # Lines outside the file raise IndexError before anything is written (span() would
+    # clamp them, appending the text at the end of a shorter file).
+    index = index or line_index(path)
+    edits = []
+    for key, data in replacements.items():
+        start_line, end_line = key if isinstance(key, tuple) else (key, key)
+        if not 1 <= start_line <= end_line <= index.line_count:
+            raise IndexError(f"{path}: lines {start_line}-{end_line} outside 1-{index.line_count}")
+        a, b = index.span(start_line, end_line)
+        edits.append((a, b, data))
+    edits.sort()
+    tmp = path + '.tmp'
+    with open(path, 'rb') as src, open(tmp, 'wb') as dst:
+        pos = 0
+        for a, b, data in edits:
+            dst.write(src.read(a - pos))
+            dst.write(data)
+            src.seek(b)
+            pos = b
+        dst.write(src.read())
+    os.replace(tmp, path)
+
+
+def newline_of(line):
+    return '\r\n' if line.endswith('\r\n') else '\n'
@@ -0,0 +1,195 @@
+import re
+from collections import namedtuple
+
+from jsx_tools.lexer import (
+    OPEN, CLOSE, TAG_OPEN, TAG_CLOSE, FRAG_OPEN, FRAG_CLOSE, tokenize,
+)
+from jsx_tools.checks import CLOSERS
+
+OPENERS = (OPEN, TAG_OPEN, FRAG_OPEN)
+ENDERS = (CLOSE, TAG_CLOSE, FRAG_CLOSE)
+COMPONENT_RE = re.compile(r'\b(?:function|const|let|class)\s+([A-Z][A-Za-z0-9_]*)')
+
+# problem: human-readable first mismatch
+# line: line of the offending token
+# start_line / end_line: smallest enclosing function or JSX element around it
+# element: what that region is ('<div>', 'function', 'file')
+# component: nearest enclosing capitalized declaration, or ''
+Location = namedtuple('Location', 'problem line start_line end_line element component')
+
+
+class MinTable:
+    # Sparse table for O(1) range-minimum queries over the depth profile
+
+    def __init__(self, values):
+        self.levels = [list(values)]
+        width = 1
+        while width * 2 <= len(values):
+            prev = self.levels[-1]
+            self.levels.append([min(prev[i], prev[i + width]) for i in range(len(prev) - width)])
+            width *= 2
+
+    def query(self, lo, hi):
+        # min(values[lo..hi]), inclusive
+        k = (hi - lo + 1).bit_length() - 1
+        level = self.levels[k]
+        return min(level[lo], level[hi - (1 << k) + 1])
+
+    def last_at_most(self, i, limit):
+        # Largest j < i with values[j] <= limit, or -1 (binary search on the prefix minimum)
+        if i <= 0 or self.query(0, i - 1) > limit:
+            return -1
+        lo, hi = 0, i - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self.query(mid, i - 1) <= limit:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo
+
+    def first_below(self, i, limit):
+        # Smallest j > i with values[j] < limit, or -1
+        n = len(self.levels[0])
+        if i + 1 >= n or self.query(i + 1, n - 1) >= limit:
+            return -1
+        lo, hi = i + 1, n - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.query(i + 1, mid) < limit:
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+
+def structure(tokens):
+    # Brackets and non-self-closing tags in source order, with the depth after each
+    items = sorted((t for t in tokens if t.kind in OPENERS or t.kind in ENDERS), key=lambda t: t.start)
+    depth = []
+    level = 0
+    for tok in items:
+        level += 1 if tok.kind in OPENERS else -1
+        depth.append(level)
+    return items, depth
+
+
+def first_problem(text, items):
+    # (index of opener or -1, index of closer or -1, message) for the first structural error
+    stack = []
+    misindented = -1
+    for i, tok in enumerate(items):
+        if tok.kind in OPENERS:
+            stack.append(i)
+            continue
+        if not stack:
+            return -1, i, f"Extra closing {describe(tok)} at line {tok.line}"
+        j = stack.pop()
+        if not matches(items[j], tok):
+            return j, i, f"Mismatch: {describe(items[j])} at {items[j].line} closed by {describe(tok)} at {tok.line}"
+        if misindented == -1 and tok.line != items[j].line and not indent_agrees(text, items[j], tok):
+            misindented = j
+    if stack:
+        # Nothing mismatched, the closer was simply dropped: every pair after it is shifted
+        # by one, so the first pair whose closer is indented unlike its opener is the best lead.
+        innermost = items[stack[-1]]
+        j = misindented if misindented != -1 else stack[-1]
+        return j, -1, f"Unclosed {describe(innermost)} from line {innermost.line}"
+    return None
+
+
+def indent_agrees(text, opener, closer):
+    line_start = text.rfind('\n', 0, closer.start) + 1
+    if text[line_start:closer.start].strip():
+        return True  # closer does not start its line; nothing to compare
+    return indent_of(text, opener.start) == closer.start - line_start
+
+
+def indent_of(text, offset):
+    line_start = text.rfind('\n', 0, offset) + 1
+    end = line_start
+    while end < len(text) and text[end] in ' \t':
+        end += 1
+    return end - line_start
+
+
+def matches(opener, closer):
+    if opener.kind == OPEN:
+        return closer.kind == CLOSE and CLOSERS[opener.value] == closer.value
+    return closer.kind in (TAG_CLOSE, FRAG_CLOSE) and closer.value == opener.value
+
+
+def describe(tok):
+    if tok.kind in (OPEN, CLOSE):
+        return tok.value
+    return f"</{tok.value}>" if tok.kind in (TAG_CLOSE, FRAG_CLOSE) else f"<{tok.value}>"
+
+
+def is_region(text, tok):
+    # JSX elements and function bodies (arrow "=> {" / "=> (", or "function ...(...) {")
+    if tok.kind in (TAG_OPEN, FRAG_OPEN):
+        return True
+    before = text[max(0, tok.start - 200):tok.start].rstrip()
+    if before.endswith('=>'):
+        return True
+    if tok.value == '{' and before.endswith(')'):
+        line_start = text.rfind('\n', 0, tok.start) + 1
+        return 'function' in text[line_start:tok.start]
+    return False
+
+
+def locate(text, tokens=None):
+    tokens = tokenize(text) if tokens is None else tokens
+    items, depth = structure(tokens)
+    found = first_problem(text, items)
+    if found is None:
+        return None
+    opener, closer, problem = found
+    table = MinTable(depth)
+    anchor = opener if opener != -1 else closer
+    last_line = text.count('\n') + 1
+
+    # climb from the anchor's parent until a function body or JSX element
+    region = -1
+    level = depth[anchor] - (1 if items[anchor].kind in OPENERS else 0)
+    while level > 0:
+        j = table.last_at_most(anchor if region == -1 else region, level - 1)
+        region = j + 1
+        if is_region(text, items[region]):
+            break
+        level -= 1
+    if region == -1 or level <= 0:
+        element = 'file'
+        start_line = 1
+        if closer != -1 and opener == -1:
+            # stray closer at top level: the construct just before it
+            start_line = items[table.last_at_most(closer, 0) + 1].line
+            element = 'statement'
+        end_line = items[closer].line if closer != -1 else last_line
+    else:
+        start_line = items[region].line
+        if closer != -1 and matches(items[region], items[closer]):
+            # the mismatched closer really belongs to the region (e.g. a dropped ')')
+            end_line = items[closer].line
+        else:
+            end = table.first_below(region, depth[region])
+            end_line = items[end].line if end != -1 else last_line
+            if closer != -1:
+                end_line = max(end_line, items[closer].line)
+        element = describe(items[region]) if items[region].kind != OPEN else 'function'
+    names = COMPONENT_RE.findall(text, 0, items[anchor].start)
+    return Location(problem, items[anchor].line, start_line, end_line, element,
+                    names[-1] if names else '')
+
+
+def print_location(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    loc = locate(content)
+    if loc is None:
+        print("No mismatches found.")
+        return None
+    print(loc.problem)
+    where = f" in component {loc.component}" if loc.component else ''
+    print(f"Smallest enclosing region: {loc.element}, lines {loc.start_line}-{loc.end_line}{where}")
+    return loc
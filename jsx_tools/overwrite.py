@@ -0,0 +1,191 @@
+import re
+from bisect import bisect_right
+from collections import Counter, defaultdict, namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # optional: the pure-Python rolling hash gives the same answers, only slower
+    np = None
+
+from jsx_tools.corruption import MIN_FRAGMENT
+from jsx_tools.line_index import LineIndex
+
+K = 16              # k-gram length
+MIN_OVERLAP = 24    # bytes a victim's tail must share with the source line
+MIN_DISTANCE = 20   # lines between victim and source; neighbours legitimately look alike
+MAX_SHARED = 16     # windows a tail gram may occur in before it counts as common code
+BASE = 0x100000001B3
+MASK = (1 << 64) - 1
+
+# victim / source: 1-based lines; offset: where the copied bytes start in the source line;
+# victim_offset: where they start in the victim line; length: bytes copied
+Overwrite = namedtuple('Overwrite', 'victim source offset victim_offset length')
+
+WORD_RE = re.compile(rb'[\w$]+')
+
+
+def is_word(byte):
+    return byte == 0x24 or byte == 0x5F or 0x30 <= byte <= 0x39 or 0x41 <= (byte & 0xDF) <= 0x5A
+
+
+def word_at(data, pos):
+    # The [\w$] run around pos (empty if there is none)
+    a = pos
+    while a > 0 and is_word(data[a - 1]):
+        a -= 1
+    b = pos
+    while b < len(data) and is_word(data[b]):
+        b += 1
+    return data[a:b]
+
+
+def window_hashes(data, k=K):
+    # Rabin-Karp hash of every k-byte window, h(w) = sum(w[i] * BASE**(k-1-i)) mod 2**64.
+    # NumPy: prefix sums of data[t] * BASE**-t (BASE is odd, so invertible mod 2**64),
+    # then window j is BASE**(j+k-1) * (G[j+k] - G[j]); uint64 arithmetic wraps for us.
+    n = len(data) - k + 1
+    if n <= 0:
+        return []
+    if np is not None:
+        inv = pow(BASE, -1, 1 << 64)
+        arr = np.frombuffer(data, dtype=np.uint8).astype(np.uint64)
+        with np.errstate(over='ignore'):
+            inv_pows = np.cumprod(np.full(len(data), inv, dtype=np.uint64))
+            inv_pows = np.concatenate(([np.uint64(1)], inv_pows[:-1]))
+            prefix = np.concatenate(([np.uint64(0)], np.cumsum(arr * inv_pows, dtype=np.uint64)))
+            pows = np.cumprod(np.full(n + k - 1, BASE, dtype=np.uint64))
+            pows = np.concatenate(([np.uint64(1)], pows))
+            return pows[k - 1:k - 1 + n] * (prefix[k:k + n] - prefix[:n])
+    top = pow(BASE, k - 1, 1 << 64)
+    h = 0
+    for b in data[:k]:
+        h = (h * BASE + b) & MASK
+    hashes = [h]
+    for i in range(k, len(data)):
+        h = ((h - data[i - k] * top) * BASE + data[i]) & MASK
+        hashes.append(h)
+    return hashes
+
+
+def gram_hash(gram):
+    h = 0
+    for b in gram:
+        h = (h * BASE + b) & MASK
+    return h
+
+
+def find_overwrites(data, min_overlap=MIN_OVERLAP, min_distance=MIN_DISTANCE, k=K, max_shared=MAX_SHARED,
+                    victims=None):
+    # Lines whose tail is a copy of part of a distant line: the victim's last k bytes are
+    # looked up among all k-grams of the file, then each hit is extended backwards. A hit
+    # is kept only if the copy starts inside a word of the source, at least MIN_FRAGMENT
+    # chars before its end, and leaves a word in the victim that exists nowhere else in
+    # the file ('ocaleCompare' after a run of NULs).
+    # Lines that merely end alike ('12px' / '16px', 'fetchHotels' / 'fetchAttractions')
+    # join at words the file uses elsewhere, and are left alone; so are lines that differ
+    # in a camelCase part ('borderRightColor' / 'borderTopColor').
+    # A tail gram found in more than max_shared windows is ordinary repeated code, and
+    # could not be pinned to one source anyway: it is skipped, which keeps the work linear.
+    # victims: the lines to look at (default all); sources are looked for in the whole file.
+    index = LineIndex.build(data)
+    offsets = index.offsets
+    tails = defaultdict(list)
+    for n in sorted(victims) if victims is not None else range(1, index.line_count + 1):
+        a, b = offsets[n - 1], offsets[n]
+        b = a + len(data[a:b].rstrip())
+        if b - a >= min_overlap:
+            tails[gram_hash(data[b - k:b])].append((n, b))
+    if not tails:
+        return []
+    hashes = window_hashes(data, k)
+    if np is not None:
+        wanted = np.fromiter(tails.keys(), dtype=np.uint64, count=len(tails))
+        positions = np.flatnonzero(np.isin(hashes, wanted)).tolist()
+        hashes = hashes[positions].tolist()
+    else:
+        positions = [i for i, h in enumerate(hashes) if h in tails]
+        hashes = [hashes[i] for i in positions]
+    occurrences = defaultdict(list)
+    for pos, h in zip(positions, hashes):
+        occurrences[h].append(pos)
+
+    words = Counter(WORD_RE.findall(data))
+    found = {}
+    for h, where in occurrences.items():
+        if len(where) > max_shared:
+            continue
+        for victim, v_end in tails[h]:
+            v_start = offsets[victim - 1]
+            gram = data[v_end - k:v_end]
+            for pos in where:
+                source = bisect_right(offsets, pos)
+                if abs(victim - source) < min_distance or pos + k > offsets[source]:
+                    continue  # too close, or the window runs into the next line
+                if data[pos:pos + k] != gram:
+                    continue
+                hit = _extend(data, words, offsets, victim, v_start, v_end, source, pos, k, min_overlap)
+                if hit is None:
+                    continue
+                # several lines may carry the copy (the source and other victims): prefer
+                # the longest, then the one whose word at the cut is most common, i.e. original
+                src_start = offsets[source - 1]
+                rank = (hit.length, words[word_at(data, src_start + hit.offset)])
+                if victim not in found or found[victim][0] < rank:
+                    found[victim] = (rank, hit)
+    return sorted(hit for _, hit in found.values())
+
+
+def _extend(data, words, offsets, victim, v_start, v_end, source, pos, k, min_overlap):
+    # The Overwrite for victim's tail matching source at pos, extended backwards from the
+    # shared gram, or None if it does not look like a copy
+    src_start = offsets[source - 1]
+    length = k
+    while (length < v_end - v_start and length < pos + k - src_start
+           and data[v_end - length - 1] == data[pos + k - length - 1]):
+        length += 1
+    copy_start = pos + k - length
+    if length < min_overlap or copy_start == src_start:
+        return None
+    before, first = data[copy_start - 1], data[copy_start]
+    if not (is_word(before) and is_word(first)):
+        return None
+    if 0x41 <= first <= 0x5A and not 0x41 <= before <= 0x5A:
+        return None  # starts at a camelCase hump: a sibling name, not a cut
+    if len(word_at(data[copy_start:], 0)) < MIN_FRAGMENT:
+        return None
+    joined = word_at(data, v_end - length)
+    if joined[:1].isdigit() or words[joined] != 1:
+        return None
+    return Overwrite(victim, source, copy_start - src_start, v_end - length - v_start, length)
+
+
+def repair_stub(path, data, hits):
+    # fix_file.py-style script: splice_lines() with each victim cut back to its own bytes,
+    # to be completed by hand (what the copy overwrote is not recoverable from the file).
+    # It exits before writing anything until that is done and the guard line is removed.
+    index = LineIndex.build(data)
+    lines = ', '.join(str(hit.victim) for hit in hits)
+    out = ["from jsx_tools.line_index import splice_lines", "", f"path = r'{path}'", "",
+           f"raise SystemExit('Complete line(s) {lines} below by hand, then delete this line.')",
+           "", "splice_lines(path, {"]
+    for hit in hits:
+        a, b = index.span(hit.victim)
+        line = data[a:b]
+        newline = b'\r\n' if line.endswith(b'\r\n') else b'\n'
+        kept = line[:hit.victim_offset].rstrip(b'\x00')
+        out.append(f"    # line {hit.victim}: {hit.length} bytes from line {hit.source} "
+                   f"(column {hit.offset + 1}) were written over its tail")
+        out.append(f"    {hit.victim}: {kept + newline!r},")
+    out.append("})")
+    return '\n'.join(out)
+
+
+def print_overwrites(path, data, hits):
+    index = LineIndex.build(data)
+    for hit in hits:
+        a, _ = index.span(hit.source)
+        copied = data[a + hit.offset:a + hit.offset + hit.length].decode('utf-8', 'replace')
+        print(f"{path}:{hit.victim}:{hit.victim_offset + 1}: tail overwritten by line {hit.source} "
+              f"from column {hit.offset + 1} ({hit.length} bytes: {copied[:40]!r}...)")
+    if not hits:
+        print(f"{path}: no overwritten lines")
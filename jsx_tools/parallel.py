@@ -0,0 +1,257 @@
+import os
+import re
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from jsx_tools.checks import make_checkers
+from jsx_tools.lexer import Lexer
+
+# Chunked parallel scan of one file. The text is cut into segments at line starts; each
+# worker lexes a run of segments from a guessed lexer state and summarizes every segment
+# per checker. The summaries are context-free and merge associatively, so folding them
+# left to right gives exactly the diagnostics (and checkpoints) of the sequential scan.
+#
+# A worker's guess is checked against the true state the chunk before it ended in; a
+# chunk that guessed wrong is re-lexed here, segment by segment, until its state agrees
+# with the worker's again. Guesses come from the previous version's checkpoints (see
+# CheckpointIndex.update), so after an edit every chunk past it usually guesses right.
+# On a first run they are read off the indentation (guess_states), which holds for
+# formatted code; where it does not, the scan degrades towards sequential.
+
+# fewer blocks than this to lex and a pool costs more than it saves
+MIN_BLOCKS = 20
+CHUNKS_PER_WORKER = 2
+
+# diagnostics: [(start of the token behind it, Diagnostic)] in order
+# closers: closer Tokens that found the stack empty; a segment to the left may match them
+# stack: (value, line) still open at the end, outermost first
+Summary = namedtuple('Summary', 'diagnostics closers stack')
+# summaries: one per default checker; kinds: {token kind: count}; state: Lexer.state() after;
+# peaks: (top, rise) per checker, see summarize(); seconds: (lexing, summarizing) it took,
+# wherever it ran, since a worker's own profile never reaches the parent
+Segment = namedtuple('Segment', 'summaries kinds state peaks seconds')
+
+EMPTY = Summary((), (), ())
+
+
+def summarize(checker, tokens):
+    # Run a fresh checker over tokens, holding back closers it could only report as extra.
+    # Also (top, rise): the checker's own deepest stack, and the most its stack ever stood
+    # above the closers held back so far (None without openers). Entered at depth D, the
+    # segment's deepest point is max(D + rise, top), as a held closer pops D if it can.
+    diagnostics = []
+    closers = []
+    rise = None
+    for tok in tokens:
+        if not checker.stack and checker.closes(tok):
+            closers.append(tok)
+            continue
+        n = len(checker.diagnostics)
+        depth = len(checker.stack)
+        checker.feed(tok)
+        if len(checker.stack) > depth and (rise is None or len(checker.stack) - len(closers) > rise):
+            rise = len(checker.stack) - len(closers)
+        if len(checker.diagnostics) > n:
+            diagnostics.append((tok.start, checker.diagnostics[-1]))
+    return Summary(diagnostics, closers, list(checker.stack)), (checker.max_depth, rise)
+
+
+def merge(a, b, checker):
+    # a followed by b; b's held-back closers pop a's open stack first. checker is a fresh
+    # instance of the checker both came from (it supplies the messages).
+    checker.stack = list(a.stack)
+    diagnostics = list(a.diagnostics)
+    closers = list(a.closers)
+    for tok in b.closers:
+        if not checker.stack:
+            closers.append(tok)
+            continue
+        n = len(checker.diagnostics)
+        checker.feed(tok)
+        if len(checker.diagnostics) > n:
+            diagnostics.append((tok.start, checker.diagnostics[-1]))
+    diagnostics.extend(b.diagnostics)
+    return Summary(diagnostics, closers, checker.stack + list(b.stack))
+
+
+def finish(summary, checker):
+    # Diagnostics of a whole-file summary, in the order the checker reports them
+    for tok in summary.closers:
+        checker.feed(tok)  # the stack is empty: reported as extra
+    extra = [(tok.start, d) for tok, d in zip(summary.closers, checker.diagnostics)]
+    found = sorted(list(summary.diagnostics) + extra, key=lambda item: item[0])
+    checker.diagnostics = [d for _, d in found]
+    checker.stack = list(summary.stack)
+    return checker.finish()
+
+
+def normal(state):
+    # Lexer states that lex the same: frames as tuples (JSON gives lists) and the brace
+    # count of plain code dropped, since nothing reads it
+    pos, line, frames = state
+    return pos, line, tuple(
+        ('code',) if f[0] == 'code' else tuple(tuple(x) if isinstance(x, list) else x for x in f)
+        for f in frames)
+
+
+TAG_NAME_RE = re.compile(r'<([A-Za-z_$][\w$.:-]*)?')
+
+
+def _opened(between):
+    # Whether a tag whose attributes run on below ended ('... >' or a lone '>') in the
+    # lines between it and the next ancestor
+    for text_line in between.split('\n'):
+        stripped = text_line.strip()
+        if stripped.startswith('>') or stripped.endswith('>') and not stripped.endswith(('=>', '/>')):
+            return True
+    return False
+
+
+def _frame_of(stripped, start, line, frames, between=''):
+    # Push what one ancestor line (an open construct the boundary sits inside) leaves
+    # open, judged from its text and the lines below it up to the next ancestor (between);
+    # start is the offset of its first non-blank char
+    top = frames[-1][0]
+    if stripped.startswith('<'):
+        m = TAG_NAME_RE.match(stripped)
+        name = m.group(1) or ''
+        if stripped.endswith('/>'):
+            return
+        if stripped.endswith('>') and not stripped.endswith('=>') or name and _opened(between):
+            if top == 'jsx':
+                frames[-1] = ('jsx', frames[-1][1] + (name,))
+            else:
+                frames.append(('jsx', (name,)))
+        elif name:
+            frames.append(('tag', name, start, line))  # attributes run on below
+    elif stripped.startswith('>'):
+        # end of a multi-line opening tag: the element is now open
+        if top == 'tag':
+            name = frames.pop()[1]
+            if frames[-1][0] == 'jsx':
+                frames[-1] = ('jsx', frames[-1][1] + (name,))
+            else:
+                frames.append(('jsx', (name,)))
+    elif top in ('jsx', 'tag') and '{' in stripped:
+        # '{cond && (' in children or 'style={{' in attributes
+        frames.append(('expr', stripped.count('{') - stripped.count('}') - 1))
+
+
+def guess_states(text, offsets):
+    # {offset: lexer state} for line starts in offsets, from the lines above that are
+    # indented less (the constructs the line sits inside), outermost first
+    wanted = set(offsets)
+    guesses = {}
+    stack = []  # (indent, offset of its first non-blank char, line) of the enclosing lines
+    pos = 0
+    for number, line_text in enumerate(text.split('\n'), 1):
+        stripped = line_text.strip()
+        if pos in wanted and stripped:
+            indent = len(line_text) - len(line_text.lstrip(' \t'))
+            # a closing line ('</div>', '/>', '))}') is still inside what it closes, which
+            # starts at its own indentation
+            closing = stripped.startswith(('</', '/>', '>', ')', '}', ']'))
+            enclosing = [item for item in stack if item[0] < indent or closing and item[0] == indent]
+            frames = [('code', 0)]
+            for k, (_, start, line) in enumerate(enclosing):
+                end = text.find('\n', start)
+                end = end if end != -1 else len(text)
+                below = enclosing[k + 1][1] if k + 1 < len(enclosing) else pos
+                _frame_of(text[start:end].rstrip(), start, line, frames, text[end:below])
+            guesses[pos] = (pos, number, tuple(frames))
+        if stripped.startswith('>'):
+            # the '>' of a multi-line opening tag: the tag line above stays the ancestor
+            # (_opened sees the '>' between it and the boundary)
+            indent = len(line_text) - len(line_text.lstrip(' \t'))
+            while stack and stack[-1][0] > indent:
+                stack.pop()
+        elif stripped:
+            indent = len(line_text) - len(line_text.lstrip(' \t'))
+            while stack and stack[-1][0] >= indent:
+                stack.pop()
+            stack.append((indent, pos + indent, number))
+        pos += len(line_text) + 1
+    return guesses
+
+
+_text = None
+
+
+def _init(text):
+    global _text
+    _text = text
+
+
+def lex_segments(state, ends, engine='fast', text=None):
+    # Segments from state up to each offset in ends (None: to the end of the text)
+    lexer = Lexer(_text if text is None else text, engine)
+    lexer.restore(state)
+    segments = []
+    for end in ends:
+        began = time.perf_counter()
+        lexer.run(end)
+        if end is None:
+            lexer.finish()
+        lexed = time.perf_counter()
+        kinds = Counter(tok.kind for tok in lexer.tokens)
+        summaries, peaks = zip(*[summarize(checker, lexer.tokens) for checker in make_checkers()])
+        lexer.tokens = []
+        seconds = (lexed - began, time.perf_counter() - lexed)
+        segments.append(Segment(list(summaries), dict(kinds), lexer.state(), list(peaks), seconds))
+    return segments
+
+
+def _lex_chunk(job):
+    state, ends, engine = job
+    return lex_segments(state, ends, engine)
+
+
+def split(cuts, start, stop, workers):
+    # Chunk starts among the candidate cuts (offsets), evenly spread over start..stop
+    count = min(workers * CHUNKS_PER_WORKER, len(cuts) + 1)
+    if count < 2:
+        return []
+    starts = []
+    for k in range(1, count):
+        target = start + (stop - start) * k // count
+        best = min(cuts, key=lambda c: abs(c - target))
+        if best > start and best not in starts:
+            starts.append(best)
+    return sorted(starts)
+
+
+def scan(text, state, ends, guesses, engine='fast', workers=None):
+    # Segments for ends (sorted offsets, the last one None), starting from the exact state.
+    # guesses: {offset: guessed Lexer.state() there} for offsets in ends that may start a
+    # chunk. Returns the same segments lex_segments(state, ends) would.
+    workers = workers or os.cpu_count() or 1
+    starts = split(sorted(guesses), state[0], len(text), workers)
+    bounds = [0] + [ends.index(s) + 1 for s in starts] + [len(ends)]
+    jobs = [(state, ends[:bounds[1]], engine)]
+    for k, s in enumerate(starts, 1):
+        jobs.append((guesses[s], ends[bounds[k]:bounds[k + 1]], engine))
+    if len(jobs) == 1:
+        return lex_segments(state, ends, engine, text)
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), initializer=_init,
+                             initargs=(text,)) as pool:
+        chunks = list(pool.map(_lex_chunk, jobs))
+    segments = list(chunks[0])
+    for (guess, chunk_ends, _), chunk in zip(jobs[1:], chunks[1:]):
+        true = segments[-1].state
+        if normal(guess) != normal(true):
+            chunk = _relex(text, true, chunk_ends, chunk, engine)
+        segments.extend(chunk)
+    return segments
+
+
+def _relex(text, state, ends, speculative, engine):
+    # Re-lex a chunk that started from a wrong guess, until its state matches the
+    # worker's at a segment end; from there on the worker's segments are right
+    segments = []
+    for i, end in enumerate(ends):
+        segments.extend(lex_segments(state, [end], engine, text))
+        state = segments[-1].state
+        if normal(state) == normal(speculative[i].state):
+            return segments + speculative[i + 1:]
+    return segments
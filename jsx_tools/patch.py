@@ -0,0 +1,131 @@
+import re
+import time
+from collections import namedtuple
+
+from jsx_tools.anchors import Anchor, Document, resolve
+from jsx_tools.corruption import scan_file
+from jsx_tools.profile import current as profile
+from jsx_tools.splice import SpliceBuffer
+
+# anchor: literal str, compiled regex or structural anchor (jsx_tools.anchors)
+# where: 'replace', 'before' or 'after' the match
+# count: matches expected (None: every match, at least one)
+# unless: literal that marks the edit as already applied; it is skipped if found
+Edit = namedtuple('Edit', 'anchor text where count unless')
+
+
+class PatchError(Exception):
+    # Raised before anything is written: the file on disk is left exactly as it was
+    pass
+
+
+class Patch:
+    # Batch of anchored edits to one file. Every anchor is located in the text as loaded,
+    # the edits are spliced into the file's bytes in offset order (SpliceBuffer: line
+    # endings and BOM untouched), and the file is written once, atomically (temp file +
+    # rename). If any anchor is missing or two edits overlap, nothing is written.
+    #
+    #     patch = Patch(path)
+    #     patch.insert_after(Declaration('handleReorder'), new_functions, count=None)
+    #     patch.replace('</Reorder.Group>', add_point_button_html, count=None)
+    #     patch.apply()
+    #     patch.report()
+
+    def __init__(self, path, precheck=True):
+        self.path = path
+        self.edits = []
+        # scan the bytes first and refuse files with NUL bytes or invalid UTF-8
+        self.precheck = precheck
+        # (edit number, anchor, matches, seconds) from the last plan(), for report()
+        self.timings = []
+        # corruption warnings from the precheck (truncated identifiers, mixed newlines, ...)
+        self.warnings = []
+
+    def replace(self, anchor, text, count=1, unless=None):
+        self.edits.append(Edit(anchor, text, 'replace', count, unless))
+        return self
+
+    def insert_before(self, anchor, text, count=1, unless=None):
+        self.edits.append(Edit(anchor, text, 'before', count, unless))
+        return self
+
+    def insert_after(self, anchor, text, count=1, unless=None):
+        self.edits.append(Edit(anchor, text, 'after', count, unless))
+        return self
+
+    def plan(self, content):
+        # [(start, end, text)] in offset order; raises PatchError listing every bad anchor
+        splices = []
+        errors = []
+        self.timings = []
+        doc = Document(content)
+        if any(isinstance(edit.anchor, Anchor) for edit in self.edits):
+            doc.build()  # lex up front, so the anchor timings below are matching only
+        prof = profile()
+        for order, edit in enumerate(self.edits):
+            if edit.unless is not None and edit.unless in content:
+                continue
+            began = time.perf_counter()
+            spans = resolve(doc, edit.anchor)
+            seconds = time.perf_counter() - began
+            self.timings.append((order + 1, edit.anchor, len(spans), seconds))
+            prof.pattern(describe(edit.anchor), seconds)
+            expected = edit.count
+            if not spans or (expected is not None and len(spans) != expected):
+                errors.append(f"edit {order + 1}: anchor {describe(edit.anchor)} matched "
+                              f"{len(spans)} times, expected {expected or 'at least 1'}")
+                continue
+            for a, b in spans:
+                if edit.where == 'before':
+                    a, b = a, a
+                elif edit.where == 'after':
+                    a, b = b, b
+                splices.append((a, b, order, edit.text))
+        splices.sort()
+        for prev, cur in zip(splices, splices[1:]):
+            if cur[0] < prev[1]:
+                errors.append(f"edits {prev[2] + 1} and {cur[2] + 1} overlap at offset {cur[0]}")
+        if errors:
+            raise PatchError(f"{self.path}: nothing written\n  " + '\n  '.join(errors))
+        return [(a, b, text) for a, b, _, text in splices]
+
+    def apply(self):
+        # Number of splices written (0: every edit was already applied, file untouched)
+        prof = profile()
+        if self.precheck:
+            with prof.phase('scan'):
+                findings, _ = scan_file(self.path)
+            errors = [f for f in findings if f.severity == 'error']
+            if errors:
+                raise PatchError(f"{self.path}: corrupted, nothing written\n  " +
+                                 '\n  '.join(f"line {f.line}: {f.message}" for f in errors))
+            self.warnings = findings
+        with prof.phase('read'):
+            buf = SpliceBuffer.load(self.path)
+        with prof.phase('decode'):
+            content = buf.text()
+        with prof.phase('match'):
+            splices = self.plan(content)
+        if not splices:
+            return 0
+        buf.splice_all_text(splices)
+        buf.save(self.path)
+        prof.count('edits', len(splices))
+        return len(splices)
+
+    def report(self):
+        # One line per resolved anchor: time, match count, anchor; slow or ambiguous ones stand out
+        for number, anchor, matches, seconds in self.timings:
+            print(f"{seconds * 1000:8.1f} ms  {matches:3d} match{'es' if matches != 1 else '  '}  "
+                  f"edit {number}: {describe(anchor)}")
+        for f in self.warnings:
+            print(f"warning: line {f.line}: {f.message}")
+
+
+def describe(anchor):
+    if not isinstance(anchor, (str, re.Pattern)):
+        return repr(anchor)
+    text = anchor if isinstance(anchor, str) else anchor.pattern
+    text = ' '.join(text.split())
+    return repr(text if len(text) <= 60 else text[:57] + '...')
+
@@ -0,0 +1,116 @@
+import atexit
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+# --profile for the scripts: wall time per phase (read, decode, split, lex, match, write,
+# ...), counters (tokens, max stack depth, bytes copied, cache hits), seconds per anchor
+# pattern and peak memory from tracemalloc, as one JSON record per run. The library code
+# reports to current(), which is a no-op unless a script started a profile. Phases can
+# nest: a patch's 'match' includes the 'lex' and 'index' of the document it matches in.
+#
+#     --profile          record printed to stderr
+#     --profile=FILE     record appended to FILE (one JSON object per line)
+
+
+class Profile:
+
+    def __init__(self, tool):
+        self.tool = tool
+        self.started = time.time()
+        self.began = time.perf_counter()
+        self.phases = Counter()
+        self.counters = Counter()
+        self.patterns = Counter()
+
+    @contextmanager
+    def phase(self, name):
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += time.perf_counter() - began
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def peak(self, name, value):
+        self.counters[name] = max(self.counters[name], value)
+
+    def pattern(self, pattern, seconds):
+        # time spent matching one anchor or regex, summed over the run
+        self.patterns[pattern] += seconds
+
+    def record(self):
+        _, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {
+            'tool': self.tool,
+            'argv': sys.argv[1:],
+            'started': self.started,
+            'seconds': time.perf_counter() - self.began,
+            'phases': dict(self.phases),
+            'counters': dict(self.counters),
+            'patterns': dict(self.patterns),
+            'peak_memory': peak,
+        }
+
+
+class NullProfile:
+    # Stands in for Profile when profiling is off; every call is a no-op
+
+    def phase(self, name):
+        return nullcontext()
+
+    def count(self, name, n=1):
+        pass
+
+    def peak(self, name, value):
+        pass
+
+    def pattern(self, pattern, seconds):
+        pass
+
+
+_current = NullProfile()
+
+
+def current():
+    return _current
+
+
+def start(tool, out=None):
+    global _current
+    tracemalloc.start()
+    _current = Profile(tool)
+    atexit.register(finish, out)
+    return _current
+
+
+def finish(out=None):
+    global _current
+    if not isinstance(_current, Profile):
+        return None
+    record = _current.record()
+    tracemalloc.stop()
+    _current = NullProfile()
+    line = json.dumps(record, ensure_ascii=False, sort_keys=True)
+    if out:
+        with open(out, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+    else:
+        print(line, file=sys.stderr)
+    return record
+
+
+def from_argv():
+    # Start profiling if the script was run with --profile[=FILE]; the tool name is the
+    # script's file name
+    for a in sys.argv[1:]:
+        if a == '--profile' or a.startswith('--profile='):
+            tool = os.path.splitext(os.path.basename(sys.argv[0]))[0]
+            return start(tool, a.partition('=')[2] or None)
+    return None
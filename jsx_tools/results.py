@@ -0,0 +1,50 @@
+import os
+
+from jsx_tools.cache import content_hash, entry_path, load_json, prune, save_bytes, save_json
+from jsx_tools.checks import Diagnostic
+
+# Part of every result key: bump it whenever the lexer or a checker changes what it reports
+RESULTS_VERSION = 2
+
+_pruned = False
+
+
+def result_key(digest, start_line=None, end_line=None, checks=('brackets', 'tags'), ignore_tags=(),
+               engine='fast'):
+    # One entry per file version and query (range, checks, ignored tags, lexer engine: a
+    # reference run must really run the reference loop)
+    query = (RESULTS_VERSION, digest, start_line, end_line, tuple(checks), tuple(sorted(ignore_tags)), engine)
+    return content_hash(repr(query))
+
+
+def load_summary(key):
+    # The stored entry itself ('diagnostics', 'tokens', 'lines', 'hash'), or None
+    data = load_json('results', key)
+    if not data or data.get('version') != RESULTS_VERSION:
+        return None
+    return data
+
+
+def load_result(key):
+    data = load_summary(key)
+    return None if data is None else [Diagnostic(*d) for d in data['diagnostics']]
+
+
+def save_result(key, digest, diagnostics, kinds, lines=None):
+    # diagnostics for this query, plus what the lexing pass learned about the whole file:
+    # a per-kind token count and, when given, its LineIndex (stored under 'lines' by digest)
+    global _pruned
+    save_json('results', key, {
+        'version': RESULTS_VERSION,
+        'hash': digest,
+        'diagnostics': [list(d) for d in diagnostics],
+        'tokens': dict(kinds),
+        'lines': lines.line_count if lines is not None else None,
+    })
+    if lines is not None and not os.path.exists(entry_path('lines', digest, '.bin')):
+        save_bytes('lines', digest, lines.to_bytes())
+    if not _pruned:
+        # a miss means something was written; keep the cache within its size budget
+        _pruned = True
+        prune()
+
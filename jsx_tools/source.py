@@ -0,0 +1,70 @@
+import mmap
+import os
+
+from jsx_tools.lexer import Lexer
+
+CHUNK_BYTES = 1 << 20
+# check_file streams anything bigger than this instead of loading it whole
+STREAM_THRESHOLD = 4 << 20
+
+
+class SourceFile:
+    # Read-only, memory-mapped view of a source file. Lines, chunks and tokens are
+    # produced lazily, so memory stays bounded by the chunk size, not the file size.
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        # mmap refuses empty files
+        self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.data)
+
+    def iter_lines(self, start=0):
+        # Decoded lines (newline kept), starting at byte offset `start`
+        data = self.data
+        size = len(data)
+        while start < size:
+            end = data.find(b'\n', start)
+            end = size if end == -1 else end + 1
+            yield data[start:end].decode('utf-8', errors='replace')
+            start = end
+
+    def iter_raw_chunks(self, chunk_bytes=CHUNK_BYTES):
+        # Runs of whole lines of roughly chunk_bytes each, as bytes
+        data = self.data
+        size = len(data)
+        start = 0
+        while start < size:
+            end = data.find(b'\n', min(start + chunk_bytes, size) - 1)
+            end = size if end == -1 else end + 1
+            yield data[start:end]
+            start = end
+
+    def iter_chunks(self, chunk_bytes=CHUNK_BYTES):
+        # Decoded runs of whole lines of roughly chunk_bytes each
+        for chunk in self.iter_raw_chunks(chunk_bytes):
+            yield chunk.decode('utf-8', errors='replace')
+
+    def iter_tokens(self, engine='fast', chunk_bytes=CHUNK_BYTES):
+        # Same tokens as lexer.tokenize() on the whole text, a chunk at a time
+        lexer = Lexer('', engine)
+        for chunk in self.iter_chunks(chunk_bytes):
+            lexer.feed(chunk)
+            yield from lexer.tokens
+            lexer.tokens = []
+        lexer.finish()
+        yield from lexer.tokens
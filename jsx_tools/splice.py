@@ -0,0 +1,136 @@
+import codecs
+import os
+from bisect import bisect_left
+
+from jsx_tools.profile import current as profile
+
+BOM = codecs.BOM_UTF8
+
+
+class SpliceBuffer:
+    # A file's bytes plus a list of pending (start, end, bytes) splices against them.
+    # Nothing is decoded or re-encoded on the way out: unchanged bytes are written from
+    # memoryview slices of the original, so CRLF/LF, a UTF-8 BOM and any odd bytes
+    # outside the edits survive exactly. Replacement text is encoded in the file's own
+    # newline style.
+    #
+    #     buf = SpliceBuffer.load(path)
+    #     text = buf.text()                      # universal newlines, no BOM
+    #     buf.splice_text(a, b, 'new code\n')    # offsets into text
+    #     buf.save(path)
+
+    def __init__(self, data):
+        self.data = data if isinstance(data, (bytes, bytearray)) else bytes(data)
+        self.bom = self.data.startswith(BOM)
+        crlf = self.data.count(b'\r\n')
+        self.newline = '\r\n' if crlf and crlf * 2 >= self.data.count(b'\n') else '\n'
+        self.splices = []
+        self._text = None
+        self._crlf = None
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def text(self):
+        # What open(path, encoding='utf-8').read() would give, minus the BOM
+        if self._text is None:
+            raw = memoryview(self.data)[len(BOM) if self.bom else 0:]
+            raw = bytes(raw).decode('utf-8')
+            # translated offsets of the newlines that were CRLF, for byte_offsets()
+            crlf = []
+            pos = raw.find('\r\n')
+            while pos != -1:
+                crlf.append(pos - len(crlf))
+                pos = raw.find('\r\n', pos + 2)
+            self._raw = raw
+            self._crlf = crlf
+            self._text = raw.replace('\r\n', '\n').replace('\r', '\n')
+        return self._text
+
+    def byte_offsets(self, positions):
+        # Offsets into text() -> offsets into the bytes; one forward walk over the
+        # sorted positions, encoding only the stretches between them
+        self.text()
+        raw = self._raw
+        ascii_only = len(raw) + (len(BOM) if self.bom else 0) == len(self.data)
+        result = {}
+        prev_char = 0
+        prev_byte = len(BOM) if self.bom else 0
+        for pos in sorted(set(positions)):
+            char = pos + bisect_left(self._crlf, pos)  # each earlier CRLF is one char longer
+            if ascii_only:
+                byte = prev_byte + char - prev_char
+            else:
+                byte = prev_byte + len(raw[prev_char:char].encode('utf-8'))
+            result[pos] = byte
+            prev_char, prev_byte = char, byte
+        return result
+
+    def encode(self, text):
+        # Replacement text ('\n' newlines) in this file's newline style
+        if self.newline != '\n':
+            text = text.replace('\r\n', '\n').replace('\n', self.newline)
+        return text.encode('utf-8')
+
+    def splice(self, start, end, data):
+        # Replace bytes start..end of the original with data (applied on save/result)
+        self.splices.append((start, end, bytes(data)))
+        return self
+
+    def splice_text(self, start, end, text):
+        offsets = self.byte_offsets((start, end))
+        return self.splice(offsets[start], offsets[end], self.encode(text))
+
+    def splice_all_text(self, splices):
+        # [(start, end, text)] with offsets into text(), mapped in one pass
+        offsets = self.byte_offsets([p for a, b, _ in splices for p in (a, b)])
+        for a, b, text in splices:
+            self.splice(offsets[a], offsets[b], self.encode(text))
+        return self
+
+    def _ordered(self):
+        splices = sorted(self.splices, key=lambda s: (s[0], s[1]))
+        for (a1, b1, _), (a2, b2, _) in zip(splices, splices[1:]):
+            if a2 < b1:
+                raise ValueError(f"splices {a1}..{b1} and {a2}..{b2} overlap")
+        return splices
+
+    def pieces(self):
+        # Unchanged memoryview slices interleaved with the replacement bytes
+        view = memoryview(self.data)
+        pos = 0
+        for a, b, data in self._ordered():
+            yield view[pos:a]
+            yield data
+            pos = b
+        yield view[pos:]
+
+    def result(self):
+        return b''.join(self.pieces())
+
+    def save(self, path, in_place=False):
+        # Atomic rewrite (temp file + rename). With in_place, edits that keep their length
+        # are written straight into the existing file instead: cost is the edit size, but
+        # a crash part-way leaves some edits applied.
+        splices = self._ordered()
+        prof = profile()
+        prof.count('bytes_inserted', sum(len(data) for _, _, data in splices))
+        if in_place and all(b - a == len(data) for a, b, data in splices):
+            with prof.phase('write'), open(path, 'r+b') as f:
+                for a, _, data in splices:
+                    f.seek(a)
+                    f.write(data)
+            return
+        prof.count('bytes_copied', len(self.data) - sum(b - a for a, b, _ in splices))
+        tmp = path + '.tmp'
+        try:
+            with prof.phase('write'), open(tmp, 'wb') as f:
+                for piece in self.pieces():
+                    f.write(piece)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
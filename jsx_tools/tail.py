@@ -0,0 +1,205 @@
+import os
+from collections import namedtuple
+
+from jsx_tools.checks import CLOSERS, VOID_TAGS
+from jsx_tools.lexer import (OPEN, TAG_OPEN, TAG_SELF, FRAG_OPEN, COMMENT, TEMPLATE, EXPR_KEYWORDS, IDENT_CHARS,
+                             tokenize)
+from jsx_tools.locate import OPENERS, indent_of, matches, structure
+
+# Tail repair for a file whose end was lost or garbled: keep everything up to the last
+# structurally valid point, then append exactly the closers its open brackets and
+# elements still need, plus any known trailers from jsx_tools/trailers/.
+
+TRAILER_DIR = os.path.join(os.path.dirname(__file__), 'trailers')
+
+# name: (element it belongs in, as a path of tag names from the outside in, () for the
+# top level after every closer; text that means the head already has it)
+TRAILERS = {
+    'debug': (('ErrorBoundary', 'div'), "view === 'debug'"),
+    'toast': (('ErrorBoundary', 'div'), 'toast.visible'),
+    'export': ((), 'export default'),
+}
+
+STATEMENTS = ('return', 'const ', 'let ', 'var ', 'export const ')
+# words before a '(' that is not a call's: 'if ()' is as invalid as 'return ()'
+GROUP_KEYWORDS = EXPR_KEYWORDS | {'if', 'while', 'for', 'switch', 'catch', 'with'}
+
+# cut: offset where the kept head ends; tail: text that replaces everything from cut on;
+# dropped: number of lines removed; added / skipped: trailer names (skipped with reason)
+TailRepair = namedtuple('TailRepair', 'cut tail dropped added skipped')
+
+
+def valid_prefix(text, items):
+    # End of the longest run of whole lines free of structural errors: the start of the
+    # line holding the first stray or mismatched closer, else the start of an unterminated
+    # last line, else the end of the text
+    cut = text.rfind('\n') + 1 if text and not text.endswith('\n') else len(text)
+    stack = []
+    for tok in items:
+        if tok.start >= cut:
+            break
+        if tok.kind in OPENERS:
+            stack.append(tok)
+        elif stack and matches(stack[-1], tok):
+            stack.pop()
+        else:
+            return text.rfind('\n', 0, tok.start) + 1
+    return cut
+
+
+def straddling(text, tokens, cut):
+    # Start of the earliest tag, block comment or template literal that begins before cut
+    # but is not finished by it ('<motion.div' whose attributes run on, an open '`...${')
+    starts = []
+    literal = None  # start of the template literal being read, chunk by chunk
+    for tok in tokens:
+        if tok.start >= cut:
+            break
+        chunk = text[tok.start:tok.end]
+        if tok.kind in (TAG_OPEN, TAG_SELF, FRAG_OPEN):
+            if tok.end > cut or not chunk.endswith('>'):
+                starts.append(tok.start)
+        elif tok.kind == COMMENT:
+            if tok.end > cut or (chunk.startswith('/*') and not chunk.endswith('*/')):
+                starts.append(tok.start)
+        elif tok.kind == TEMPLATE:
+            if literal is None:
+                literal = tok.start
+            if tok.end > cut or not chunk.endswith(('`', '${')) or len(chunk) == 1:
+                starts.append(literal)
+            if chunk.endswith('`') and len(chunk) > 1:
+                literal = None
+    if literal is not None:
+        starts.append(literal)  # stopped inside a '${...}' expression
+    return min(starts) if starts else None
+
+
+def is_call(text, tok):
+    # '(' of a call or a parameter list ('f(' closes as 'f()'), rather than a group
+    i = len(text[:tok.start].rstrip()) - 1
+    if i < 0 or text[i] not in IDENT_CHARS | {')', ']'}:
+        return False
+    j = i
+    while j > 0 and text[j - 1] in IDENT_CHARS:
+        j -= 1
+    return text[j:i + 1] not in GROUP_KEYWORDS
+
+
+def open_stack(text, tokens, items, cut):
+    # (cut, openers still open there, outermost first). A cut inside a construct that
+    # spans lines moves back to the line that construct starts on, and so does a cut
+    # right after a group's '(' ('{open && (', 'return ('): closing it empty, as
+    # '{open && ()}', would not parse.
+    while True:
+        start = straddling(text, tokens, cut)
+        if start is not None:
+            cut = text.rfind('\n', 0, start) + 1
+            continue
+        stack = []
+        for tok in items:
+            if tok.start >= cut:
+                break
+            if tok.kind in OPENERS:
+                stack.append(tok)
+            elif stack and matches(stack[-1], tok):
+                stack.pop()
+        last = stack[-1] if stack else None
+        if (last is None or last.kind != OPEN or last.value != '(' or text[last.end:cut].strip()
+                or is_call(text, last)):
+            return cut, stack
+        cut = text.rfind('\n', 0, last.start) + 1
+
+
+def closer_of(tok):
+    if tok.kind == OPEN:
+        return CLOSERS[tok.value]
+    return '</>' if tok.kind == FRAG_OPEN else f"</{tok.value}>"
+
+
+def ends_statement(text, outer, inner):
+    # 'return (' and 'const x = ... {' lines need a ';' after their closers
+    if inner.kind != OPEN:
+        return False
+    line_end = text.find('\n', inner.start)
+    if text[inner.start + 1:line_end if line_end != -1 else len(text)].strip():
+        return False
+    line_start = text.rfind('\n', 0, outer.start) + 1
+    return text[line_start:outer.start].lstrip().startswith(STATEMENTS)
+
+
+def find_element(stack, path):
+    # Index in stack of the element at the end of path (tags only, consecutive), or -1
+    tags = [(i, t.value) for i, t in enumerate(stack) if t.kind == TAG_OPEN]
+    for k in range(len(tags) - len(path), -1, -1):
+        if [v for _, v in tags[k:k + len(path)]] == list(path):
+            return tags[k + len(path) - 1][0]
+    return -1
+
+
+def load_trailer(name):
+    with open(os.path.join(TRAILER_DIR, name + '.tsx'), encoding='utf-8') as f:
+        return f.read()
+
+
+def indented(block, indent):
+    return ''.join(' ' * indent + line if line.strip() else line
+                   for line in block.splitlines(keepends=True))
+
+
+def repair_tail(text, trailers=(), tokens=None):
+    tokens = sorted(tokenize(text) if tokens is None else tokens, key=lambda t: t.start)
+    items = [t for t in structure(tokens)[0] if not (t.kind == TAG_OPEN and t.value in VOID_TAGS)]
+    cut, stack = open_stack(text, tokens, items, valid_prefix(text, items))
+    head = text[:cut]
+
+    added = []
+    skipped = []
+    inside = {}  # stack index -> trailer blocks to emit before that element's closer
+    at_end = []
+    for name in trailers:
+        path, marker = TRAILERS[name]
+        if marker in head:
+            skipped.append((name, 'already present'))
+            continue
+        if not path:
+            at_end.append(load_trailer(name))
+            added.append(name)
+            continue
+        i = find_element(stack, path)
+        if i == -1:
+            skipped.append((name, f"no open <{'> <'.join(path)}> at the cut"))
+            continue
+        inside.setdefault(i, []).append(indented(load_trailer(name), indent_of(text, stack[i].start) + 4))
+        added.append(name)
+
+    # one line per opener line, innermost first: '{cond && (' closes as ')}'; an element
+    # receiving a trailer gets a line of its own
+    lines = []
+    group = []
+    for i in range(len(stack) - 1, -1, -1):
+        tok = stack[i]
+        if group and (group[-1][1].line != tok.line or i in inside):
+            lines.append(group)
+            group = []
+        group.append((i, tok))
+        if i in inside:
+            lines.append(group)
+            group = []
+    if group:
+        lines.append(group)
+
+    out = []
+    for group in lines:
+        for i, _ in group:
+            for block in inside.get(i, ()):
+                out.append('\n' + block)
+        outer = group[-1][1]
+        closing = ''.join(closer_of(tok) for _, tok in group)
+        if ends_statement(text, outer, group[0][1]):
+            closing += ';'
+        out.append(' ' * indent_of(text, outer.start) + closing + '\n')
+    for block in at_end:
+        out.append('\n' + block)
+    rest = text[cut:]
+    dropped = rest.count('\n') + (1 if rest and not rest.endswith('\n') else 0)
+    return TailRepair(cut, ''.join(out), dropped, added, skipped)
@@ -0,0 +1,190 @@
+import struct
+from array import array
+from itertools import accumulate
+
+from jsx_tools.cache import content_hash, load_bytes, save_bytes
+from jsx_tools.lexer import (
+    OPEN, CLOSE, TAG_OPEN, TAG_SELF, TAG_CLOSE, FRAG_OPEN, FRAG_CLOSE,
+    STRING, TEMPLATE, COMMENT, REGEX, Lexer, Token,
+)
+
+# Struct-of-arrays token stream: one array column per field instead of one Python object
+# per token (a namedtuple Token costs ~100 bytes; a row here is 24). Values (bracket
+# chars and tag names) are interned in `names` and stored as indexes into it.
+# TokenView objects are made only when a token is looked at.
+#
+# depth: nesting level after the token, counting brackets and non-self-closing tags in
+# start order as locate.structure() does (negative after stray closers); other tokens
+# carry the level they sit at. Only filled in for a store in start order (see lex()).
+
+KINDS = (OPEN, CLOSE, TAG_OPEN, TAG_SELF, TAG_CLOSE, FRAG_OPEN, FRAG_CLOSE,
+         STRING, TEMPLATE, COMMENT, REGEX)
+CODES = {kind: code for code, kind in enumerate(KINDS)}
+OPENER_CODES = frozenset(CODES[k] for k in (OPEN, TAG_OPEN, FRAG_OPEN))
+ENDER_CODES = frozenset(CODES[k] for k in (CLOSE, TAG_CLOSE, FRAG_CLOSE))
+
+# bump when the layout or the lexer's output changes
+STORE_VERSION = 1
+# version, token count, bytes of the names blob
+HEADER = struct.Struct('<III')
+COLUMNS = ('kind', 'value', 'line', 'start', 'end', 'depth')
+
+
+class TokenView:
+    # One row of a TokenStore, read-only, with the same fields as lexer.Token
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    @property
+    def kind(self):
+        return KINDS[self.store.kind[self.index]]
+
+    @property
+    def value(self):
+        return self.store.names[self.store.value[self.index]]
+
+    @property
+    def line(self):
+        return self.store.line[self.index]
+
+    @property
+    def start(self):
+        return self.store.start[self.index]
+
+    @property
+    def end(self):
+        return self.store.end[self.index]
+
+    @property
+    def depth(self):
+        return self.store.depth[self.index]
+
+    def token(self):
+        return self.store.token(self.index)
+
+    def __repr__(self):
+        return f"TokenView({self.index}, {self.token()!r})"
+
+
+class TokenStore:
+
+    def __init__(self):
+        self.kind = array('I')
+        self.value = array('I')
+        self.line = array('I')
+        self.start = array('I')
+        self.end = array('I')
+        self.depth = array('i')
+        self.names = ['']
+        self._codes = {'': 0}
+
+    @classmethod
+    def lex(cls, text, engine='fast'):
+        # Every token of text, in start order, with depths
+        store = cls()
+        lexer = Lexer(text, engine)
+        lexer.tokens = store
+        lexer.run()
+        lexer.finish()
+        return store.sorted()
+
+    @classmethod
+    def from_tokens(cls, tokens):
+        store = cls()
+        for tok in tokens:
+            store.append(tok)
+        return store
+
+    def append(self, tok):
+        # Takes a lexer Token, so a store can stand in for Lexer.tokens
+        code = self._codes.get(tok.value)
+        if code is None:
+            code = self._codes[tok.value] = len(self.names)
+            self.names.append(tok.value)
+        self.kind.append(CODES[tok.kind])
+        self.value.append(code)
+        self.line.append(tok.line)
+        self.start.append(tok.start)
+        self.end.append(tok.end)
+        self.depth.append(0)
+
+    def __len__(self):
+        return len(self.kind)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self.kind)
+        if not 0 <= i < len(self.kind):
+            raise IndexError(i)
+        return TokenView(self, i)
+
+    def __iter__(self):
+        for i in range(len(self.kind)):
+            yield TokenView(self, i)
+
+    def token(self, i):
+        return Token(KINDS[self.kind[i]], self.names[self.value[i]], self.line[i], self.start[i], self.end[i])
+
+    def tokens(self, lo=0, hi=None):
+        # Rows lo..hi as short-lived lexer Tokens, for hot loops (the checkers) where a
+        # tuple's fields read faster than a view's properties
+        names = self.names
+        for kind, value, line, start, end in zip(
+                self.kind[lo:hi], self.value[lo:hi], self.line[lo:hi], self.start[lo:hi], self.end[lo:hi]):
+            yield Token(KINDS[kind], names[value], line, start, end)
+
+    def indexes(self, *kinds):
+        # Rows of the given kinds, in store order
+        codes = frozenset(CODES[k] for k in kinds)
+        return [i for i, k in enumerate(self.kind) if k in codes]
+
+    def sorted(self):
+        # Copy in start order (ties keep lexer order) with the depth column filled in
+        order = sorted(range(len(self.kind)), key=self.start.__getitem__)
+        store = TokenStore()
+        store.names = self.names
+        store._codes = self._codes
+        for name in COLUMNS[:-1]:
+            column = getattr(self, name)
+            setattr(store, name, array(column.typecode, map(column.__getitem__, order)))
+        step = [1 if k in OPENER_CODES else -1 if k in ENDER_CODES else 0 for k in range(len(KINDS))]
+        store.depth = array('i', accumulate(map(step.__getitem__, store.kind)))
+        return store
+
+    def to_bytes(self):
+        names = '\0'.join(self.names).encode('utf-8')
+        parts = [HEADER.pack(STORE_VERSION, len(self.kind), len(names)), names]
+        parts.extend(getattr(self, name).tobytes() for name in COLUMNS)
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        # None for data written by another version
+        version, count, size = HEADER.unpack_from(data)
+        if version != STORE_VERSION:
+            return None
+        store = cls()
+        pos = HEADER.size
+        store.names = data[pos:pos + size].decode('utf-8').split('\0')
+        store._codes = {name: code for code, name in enumerate(store.names)}
+        pos += size
+        for name in COLUMNS:
+            column = getattr(store, name)
+            width = count * column.itemsize
+            column.frombytes(data[pos:pos + width])
+            pos += width
+        return store
+
+
+def token_store(text, engine='fast'):
+    # TokenStore.lex(text), cached on disk as raw column buffers by content hash and engine
+    digest = content_hash(repr((content_hash(text), engine)))
+    data = load_bytes('tokens', digest)
+    store = TokenStore.from_bytes(data) if data is not None else None
+    if store is None:
+        store = TokenStore.lex(text, engine)
+        save_bytes('tokens', digest, store.to_bytes())
+    return store
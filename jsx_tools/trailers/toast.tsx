@@ -0,0 +1,12 @@
+<AnimatePresence>
+    {toast.visible && (
+        <motion.div
+            initial={{ opacity: 0, scale: 0.8, x: '-50%', y: '-50%' }} animate={{ opacity: 1, scale: 1, x: '-50%', y: '-50%' }} exit={{ opacity: 0, scale: 0.8, x: '-50%', y: '-50%' }}
+            style={{ position: 'fixed', top: '50%', left: '50%', background: 'rgba(20, 20, 30, 0.95)', backdropFilter: 'blur(16px)', color: 'white', padding: '32px 48px', borderRadius: '24px', zIndex: 99999, border: '1px solid rgba(255,255,255,0.1)', textAlign: 'center' }}
+        >
+            <div style={{ width: 60, height: 60, borderRadius: '50%', background: 'rgba(0, 212, 255, 0.1)', border: '1px solid var(--primary)', display: 'flex', alignItems: 'center', justifyContent: 'center', color: 'var(--primary)', margin: '0 auto 20px' }}><CheckCircle size={32} /></div>
+            <div style={{ fontWeight: 800, fontSize: '18px' }}>저장 완료!</div>
+            <div style={{ opacity: 0.8, marginTop: 4 }}>{toast.message}</div>
+        </motion.div>
+    )}
+</AnimatePresence>
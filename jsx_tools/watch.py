@@ -0,0 +1,206 @@
+import ctypes
+import ctypes.util
+import os
+import re
+import select
+import struct
+import sys
+import time
+from collections import Counter
+
+from jsx_tools.checks import check_file
+from jsx_tools.project import SKIP_DIRS, SOURCE_EXTS, check_files, find_sources
+
+DEBOUNCE = 0.05
+POLL_INTERVAL = 0.05
+
+# inotify(7)
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT = struct.Struct('iIII')
+
+
+def is_source(path):
+    return path.endswith(SOURCE_EXTS)
+
+
+class PollWatcher:
+    # Portable fallback: compares (size, mtime_ns) of every source file each interval
+
+    def __init__(self, root, interval=POLL_INTERVAL):
+        self.root = root
+        self.interval = interval
+        self.seen = self._scan()
+
+    def _scan(self):
+        stats = {}
+        for path in find_sources(self.root):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            stats[path] = (st.st_size, st.st_mtime_ns)
+        return stats
+
+    def wait(self, timeout=None):
+        # Changed, created or deleted paths; empty once timeout (seconds) runs out
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._scan()
+            changed = {p for p in current.keys() | self.seen.keys() if current.get(p) != self.seen.get(p)}
+            self.seen = current
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    # Linux: one inotify watch per directory, added as directories appear
+
+    def __init__(self, root):
+        self.root = root
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.dirs = {}
+        self._add_tree(root)
+
+    def _add_tree(self, top):
+        for dirpath, dirnames, _ in os.walk(top):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(dirpath), WATCH_MASK)
+            if wd >= 0:
+                self.dirs[wd] = dirpath
+
+    def _read(self):
+        changed = set()
+        data = os.read(self.fd, 1 << 16)
+        pos = 0
+        while pos < len(data):
+            wd, mask, _, size = EVENT.unpack_from(data, pos)
+            name = data[pos + EVENT.size:pos + EVENT.size + size].rstrip(b'\0')
+            pos += EVENT.size + size
+            if mask & IN_Q_OVERFLOW:
+                # events were dropped: treat everything as changed
+                changed.update(find_sources(self.root))
+                continue
+            if wd not in self.dirs or not name:
+                continue
+            path = os.path.join(self.dirs[wd], os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and os.path.basename(path) not in SKIP_DIRS:
+                    self._add_tree(path)
+                    changed.update(find_sources(path))
+            elif is_source(path):
+                changed.add(path)
+        return changed
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            left = None if deadline is None else max(deadline - time.monotonic(), 0)
+            ready, _, _ = select.select([self.fd], [], [], left)
+            if not ready:
+                return set()
+            changed = self._read()
+            if changed:
+                return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def make_watcher(root, poll=False):
+    # inotify where the platform has it, polling everywhere else
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError):
+            pass
+    return PollWatcher(root)
+
+
+LABELS = [
+    (re.compile(r'Unclosed tag (<[^>]*>)'), 'unclosed {}'),
+    (re.compile(r'Unclosed (\S+)'), 'unclosed {}'),
+    (re.compile(r'Extra closing tag (</[^>]*>)'), 'extra {}'),
+    (re.compile(r'Extra closing (\S+)'), 'extra {}'),
+    (re.compile(r'Mismatch: (\S+) at \d+ closed by (\S+)'), 'mismatch {} / {}'),
+]
+
+
+def label(d):
+    # Line-free description, so a diagnostic that only moved is not reported as new
+    for pattern, fmt in LABELS:
+        m = pattern.match(d.message)
+        if m:
+            return fmt.format(*m.groups())
+    return d.message
+
+
+def delta(old, new, name):
+    # "new: 1 unclosed <div> at App.tsx:3214; fixed: 2", or '' when nothing changed
+    before = Counter(label(d) for d in old)
+    after = Counter(label(d) for d in new)
+    added = after - before
+    fixed = sum((before - after).values())
+    parts = []
+    if added:
+        first = {}
+        for d in sorted(new):
+            first.setdefault(label(d), d.line)
+        parts.append('new: ' + ', '.join(f"{n} {lab} at {name}:{first[lab]}" for lab, n in added.items()))
+    if fixed:
+        parts.append(f"fixed: {fixed}")
+    return '; '.join(parts)
+
+
+def watch(root, checks=('brackets', 'tags'), engine='fast', debounce=DEBOUNCE, poll=False, out=print):
+    # Full check once, then re-check only the files that changed. Bursts of writes (a patch
+    # script touching several files) are collected until `debounce` seconds pass quietly.
+    known = {r.path: r.diagnostics for r in check_files(find_sources(root), checks, engine=engine)}
+    problems = sum(len(v) for v in known.values())
+    watcher = make_watcher(root, poll)
+    out(f"watching {root} ({type(watcher).__name__}): {len(known)} files, {problems} problems")
+    try:
+        while True:
+            changed = watcher.wait()
+            while True:
+                more = watcher.wait(debounce)
+                if not more:
+                    break
+                changed |= more
+            began = time.perf_counter()
+            for path in sorted(changed):
+                name = os.path.relpath(path, root)
+                old = known.get(path, [])
+                if os.path.isfile(path):
+                    try:
+                        known[path] = check_file(path, checks=checks, engine=engine)
+                    except (OSError, UnicodeDecodeError) as e:
+                        # caught mid-write; the closing event will bring it back, and is
+                        # compared against what was known before
+                        out(f"{name}: {e}")
+                        continue
+                else:
+                    known.pop(path, None)
+                msg = delta(old, known.get(path, []), name)
+                if msg:
+                    out(f"{msg}  ({(time.perf_counter() - began) * 1000:.0f} ms)")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
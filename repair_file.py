@@ -0,0 +1,22 @@
+import sys
+
+from jsx_tools import profile
+from jsx_tools.align import corrupted_hunks, print_hunks, restore_hunks
+
+if __name__ == '__main__':
+    profile.from_argv()
+    # Align App.tsx against the pristine copy in src_backup_okinawa and restore only the
+    # hunks that look corrupted (NULs, truncated identifiers, overwritten tails); other
+    # differences are newer edits and are kept. Dry run unless --write.
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    path = args[0] if args else r'e:\anti\okinawa\src\App.tsx'
+    backup = args[1] if len(args) > 1 else r'e:\anti\okinawa\src_backup_okinawa\App.tsx'
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(backup, 'rb') as f:
+        old = f.read()
+    hunks, kept = corrupted_hunks(data, old)
+    print_hunks(path, data, old, hunks, kept)
+    if hunks and '--write' in sys.argv:
+        restore_hunks(path, data, old, hunks)
+        print(f"Restored {len(hunks)} hunk(s) in {path}.")
@@ -0,0 +1,38 @@
+import sys
+
+from jsx_tools import profile
+from jsx_tools.splice import SpliceBuffer
+from jsx_tools.tail import TRAILERS, repair_tail
+
+if __name__ == '__main__':
+    profile.from_argv()
+    # Replaces fix_tail.py / fix_final.py / rebuild_tail*.py: keep the file up to its last
+    # structurally valid line and append only the closers still needed. Trailers from
+    # jsx_tools/trailers/ are re-attached with --trailer=debug,toast,export (or =all).
+    # Dry run unless --write.
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    path = args[0] if args else r'e:\anti\okinawa\src\App.tsx'
+    trailers = ()
+    for a in sys.argv[1:]:
+        if a.startswith('--trailer='):
+            value = a.split('=', 1)[1]
+            trailers = tuple(TRAILERS) if value == 'all' else tuple(value.split(','))
+    unknown = [name for name in trailers if name not in TRAILERS]
+    if unknown:
+        sys.exit(f"Unknown trailer(s): {', '.join(unknown)} (known: {', '.join(TRAILERS)})")
+
+    buf = SpliceBuffer.load(path)
+    text = buf.text()
+    repair = repair_tail(text, trailers)
+    kept = text.count('\n', 0, repair.cut)
+    print(f"{path}: keeping lines 1-{kept}, dropping {repair.dropped} line(s)")
+    for name, why in repair.skipped:
+        print(f"  trailer '{name}' skipped: {why}")
+    if not repair.tail and not repair.dropped:
+        print("Nothing to repair.")
+        sys.exit(0)
+    print(repair.tail, end='')
+    if '--write' in sys.argv:
+        buf.splice_text(repair.cut, len(text), repair.tail)
+        buf.save(path)
+        print(f"Rewrote the tail of {path}.")
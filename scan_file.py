@@ -0,0 +1,16 @@
+import sys
+
+from jsx_tools import profile
+from jsx_tools.corruption import print_findings, scan_file
+
+if __name__ == '__main__':
+    profile.from_argv()
+    # Byte-level pre-check: NUL runs, invalid UTF-8, control characters, mixed CRLF/LF and
+    # truncated identifiers ('ocaleCompare'). Exits 1 if anything would break a patch.
+    paths = [a for a in sys.argv[1:] if not a.startswith('--')] or [r'e:\anti\okinawa\src\App.tsx']
+    failed = False
+    for path in paths:
+        findings, scanner = scan_file(path)
+        print_findings(path, findings, scanner)
+        failed = failed or any(f.severity == 'error' for f in findings)
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,11 @@
+import sys
+
+from jsx_tools.watch import watch
+
+if __name__ == '__main__':
+    # Re-checks brackets and tags of every .ts/.tsx file under the source root as it is saved
+    # and prints only what changed. --poll forces the stat-polling watcher.
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    root = args[0] if args else r'e:\anti\okinawa\src'
+    engine = 'reference' if '--reference' in sys.argv else 'fast'
+    watch(root, engine=engine, poll='--poll' in sys.argv)